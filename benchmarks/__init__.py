@@ -0,0 +1,16 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmarks for the hot paths of groundworks.
+
+Run them from the root of the repository with::
+
+    $ python -m benchmarks.run --sizes 100,1000,10000 --output results.json
+    $ python -m benchmarks.run --compare results.json
+
+The import times of the groundworks modules are measured separately with::
+
+    $ python -m benchmarks.importtime
+
+They use their own settings and an in-memory SQLite database, so they do not
+need a project.
+"""
@@ -0,0 +1,144 @@
+# -*- coding: utf-8 -*-
+"""
+Measures the import time of the groundworks modules with
+``python -X importtime``.
+
+Each module is imported in a fresh interpreter, after ``django.setup()``, so
+that the reported times are those of a cold start. The cumulative import
+time of each module (median of ``--repeat`` runs) and its heaviest
+dependencies are reported as JSON, along with whether the module can be
+imported before ``django.setup()`` (e.g. from a settings or an ``apps``
+module). Run it from the root of the repository with::
+
+    $ python -m benchmarks.importtime --output importtime.json
+"""
+from __future__ import print_function, unicode_literals
+
+import argparse
+import json
+import re
+import subprocess
+import sys
+
+MODULES = [
+    'groundworks.utils',
+    'groundworks.forms',
+    'groundworks.admin',
+    'groundworks.middleware',
+    'groundworks.views',
+    'groundworks.cache',
+    'groundworks.templatetags.i18n_utils',
+    'groundworks.contrib.uuslug.models',
+    'groundworks.contrib.ckeditor.models',
+]
+
+CONFIGURE = """
+from django.conf import settings
+settings.configure(
+    INSTALLED_APPS=[
+        'django.contrib.contenttypes', 'django.contrib.auth', 'groundworks'],
+    DATABASES={'default': {'ENGINE': 'django.db.backends.sqlite3',
+                           'NAME': ':memory:'}},
+)
+"""
+
+SETUP = CONFIGURE + """
+import django
+django.setup()
+import sys
+sys.stderr.write('--- setup done ---\\n')
+import {module}
+"""
+
+LINE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)')
+
+
+def measure(module):
+    """
+    Return the cumulative import time of ``module`` in microseconds and the
+    self time of each module it brought in, or ``None`` if it cannot be
+    imported.
+    """
+    process = subprocess.Popen(
+        [sys.executable, '-X', 'importtime', '-c',
+         SETUP.replace('{module}', module)],
+        stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+        universal_newlines=True)
+    __, stderr = process.communicate()
+    if process.returncode != 0:
+        return None
+
+    stderr = stderr.split('--- setup done ---', 1)[1]
+    cumulative = 0
+    imported = {}
+    for line in stderr.splitlines():
+        match = LINE.match(line)
+        if not match:
+            continue
+        self_us, cumulative_us, __, name = match.groups()
+        imported[name] = int(self_us)
+        if name == module:
+            cumulative = int(cumulative_us)
+    return cumulative, imported
+
+
+def is_importable_before_setup(module):
+    """
+    Check whether ``module`` can be imported before ``django.setup()``.
+    """
+    process = subprocess.Popen(
+        [sys.executable, '-c', CONFIGURE + 'import {}\n'.format(module)],
+        stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    process.communicate()
+    return process.returncode == 0
+
+
+def median(values):
+    values = sorted(values)
+    return values[len(values) // 2]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        '--repeat', type=int, default=5,
+        help='Number of fresh interpreters per module (default: 5).')
+    parser.add_argument(
+        '--top', type=int, default=10,
+        help='Number of the heaviest dependencies to report (default: 10).')
+    parser.add_argument(
+        '--output', help='Write the results as JSON to this file.')
+    args = parser.parse_args(argv)
+
+    results = []
+    for module in MODULES:
+        runs = [measure(module) for __ in range(args.repeat)]
+        if any(run is None for run in runs):
+            print('Skipping {} (cannot be imported)'.format(module),
+                  file=sys.stderr)
+            continue
+        heaviest = sorted(runs[-1][1].items(), key=lambda item: -item[1])
+        result = {
+            'module': module,
+            'cumulative_us': median([run[0] for run in runs]),
+            'modules_imported': len(runs[-1][1]),
+            'heaviest': heaviest[:args.top],
+            'importable_before_setup': is_importable_before_setup(module),
+        }
+        results.append(result)
+        print('{:<45} {:>10}us {:>5} modules{}'.format(
+            module, result['cumulative_us'], result['modules_imported'],
+            '' if result['importable_before_setup'] else
+            ' (needs django.setup())'), file=sys.stderr)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'results': results}, f, indent=2)
+    else:
+        json.dump({'results': results}, sys.stdout, indent=2)
+        print()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,44 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import models
+from django.urls import reverse
+
+from groundworks import managers as gw_managers
+from groundworks.models import Publishable, TimeStamped, WithMultilingualURL
+
+
+class EntryQuerySet(gw_managers.PublishableQuerySet,
+                    gw_managers.TimeStampedQuerySet):
+    pass
+
+
+class SQLiteRandomizingManager(gw_managers.RandomizingManager):
+    # DISTINCT ON is only supported by PostgreSQL
+    def _get_pool_for_random(self):
+        return self.get_queryset()
+
+
+class Entry(Publishable, TimeStamped, WithMultilingualURL):
+    title = models.CharField(max_length=255)
+
+    objects = models.Manager.from_queryset(EntryQuerySet)()
+    randomizing = SQLiteRandomizingManager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['is_published', 'date_published']),
+            models.Index(fields=['date_created']),
+        ]
+
+    def get_absolute_url(self):
+        return reverse('entry_detail', args=(self.pk,))
+
+
+try:
+    from groundworks.contrib.uuslug.models import UUSlugged
+except ImportError:  # django-uuslug is not installed
+    UUSlugged = None
+else:
+    class Story(UUSlugged):
+        title = models.CharField(max_length=255)
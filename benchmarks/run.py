@@ -0,0 +1,305 @@
+# -*- coding: utf-8 -*-
+"""
+Runs the benchmarks and reports their results as JSON.
+
+For every benchmark and table size, this reports the time per call (mean,
+min and max over the repeats), the number of queries and the peak memory
+allocated by a single call. The results can be saved and compared against
+later runs with ``--compare``, which exits with a non-zero status if any
+benchmark has become slower than ``--threshold`` times its baseline.
+"""
+from __future__ import print_function, unicode_literals
+
+import argparse
+import datetime
+import gc
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'benchmarks.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.core import mail  # noqa: E402
+from django.core.management import call_command  # noqa: E402
+from django.core.paginator import Paginator  # noqa: E402
+from django.db import connection  # noqa: E402
+from django.http import HttpResponseNotFound  # noqa: E402
+from django.test import RequestFactory  # noqa: E402
+from django.test.utils import CaptureQueriesContext  # noqa: E402
+from django.utils import timezone  # noqa: E402
+
+from benchmarks import models as bench_models  # noqa: E402
+from groundworks.middleware import BrokenLinkEmailsToAdminsMiddleware  # noqa
+from groundworks.templatetags.i18n_utils import strip_accents  # noqa: E402
+from groundworks.utils import upload_path  # noqa: E402
+
+BENCHMARKS = []
+
+
+def benchmark(name, number=1, sized=True):
+    """
+    Register a benchmark. The decorated function is called with the table
+    size (after the tables have been seeded) and returns the callable to be
+    timed, which makes ``number`` calls to the code being measured.
+
+    Benchmarks that are not ``sized`` do not depend on the database and run
+    only once, instead of once per size.
+    """
+    def decorator(func):
+        BENCHMARKS.append({
+            'name': name, 'number': number, 'sized': sized, 'setup': func,
+        })
+        return func
+    return decorator
+
+
+def seed(size):
+    """
+    Replace the contents of the tables with ``size`` rows each.
+    """
+    Entry = bench_models.Entry
+    Entry.objects.all().delete()
+    now = timezone.now()
+    entries = []
+    for i in range(size):
+        entries.append(Entry(
+            title='Entry {}'.format(i),
+            is_published=i % 3 != 0,
+            # A tenth of the entries is scheduled for the future
+            date_published=now - datetime.timedelta(hours=i - size // 10),
+            date_created=now - datetime.timedelta(minutes=i),
+        ))
+    Entry.objects.bulk_create(entries, batch_size=500)
+
+    if bench_models.UUSlugged is not None:
+        Story = bench_models.Story
+        Story.objects.all().delete()
+        # Every story collides with the slug of a new "News" story
+        slugs = ['news'] + ['news-{}'.format(i) for i in range(1, size)]
+        Story.objects.bulk_create(
+            [Story(title='News', slug=slug) for slug in slugs],
+            batch_size=500)
+
+
+@benchmark('RandomizingManager.get_random')
+def bench_get_random(size):
+    return lambda: bench_models.Entry.randomizing.get_random(10)
+
+
+@benchmark('PublishableQuerySet.published')
+def bench_published(size):
+    return lambda: list(bench_models.Entry.objects.published()[:100])
+
+
+@benchmark('TimeStampedQuerySet.newest pagination')
+def bench_newest_pagination(size):
+    paginator = Paginator(bench_models.Entry.objects.newest(), 20)
+
+    def run():
+        # Counting is part of every paginated listing
+        paginator.__dict__.pop('count', None)
+        list(paginator.page(max(paginator.num_pages // 2, 1)))
+    return run
+
+
+@benchmark('UUSlugged.save with slug collisions')
+def bench_uuslugged_save(size):
+    if bench_models.UUSlugged is None:
+        return None
+    return lambda: bench_models.Story(title='News').save()
+
+
+@benchmark('upload_path', number=1000, sized=False)
+def bench_upload_path(size):
+    try:
+        import unidecode  # noqa: F401
+    except ImportError:
+        return None
+    instance = bench_models.Entry(title='Μια φωτογραφία από τη θάλασσα')
+
+    def run():
+        for __ in range(1000):
+            upload_path(instance, 'Φωτογραφία.jpeg')
+    return run
+
+
+@benchmark('strip_accents', number=1000, sized=False)
+def bench_strip_accents(size):
+    text = 'Καλημέρα κόσμε, ça va très bien à Zürich'
+
+    def run():
+        for __ in range(1000):
+            strip_accents(text)
+    return run
+
+
+@benchmark('get_absolute_url_for_lang', number=300, sized=False)
+def bench_get_absolute_url_for_lang(size):
+    entry = bench_models.Entry(pk=1, title='Entry')
+
+    def run():
+        for __ in range(100):
+            for lang in ('en', 'el', 'de'):
+                entry.get_absolute_url_for_lang(lang)
+    return run
+
+
+@benchmark('BrokenLinkEmailsToAdminsMiddleware 404', number=100, sized=False)
+def bench_404_middleware(size):
+    middleware = BrokenLinkEmailsToAdminsMiddleware(
+        lambda request: HttpResponseNotFound())
+    request = RequestFactory().get(
+        '/missing/', HTTP_REFERER='http://testserver/somewhere/')
+
+    def run():
+        for __ in range(100):
+            middleware(request)
+        mail.outbox = []
+    return run
+
+
+def measure(run, number, repeat):
+    """
+    Time ``run`` and return its timings per call, its number of queries and
+    its peak memory allocation.
+    """
+    run()  # Warm up
+    timings = []
+    gc.disable()
+    try:
+        for __ in range(repeat):
+            start = time.perf_counter()
+            run()
+            timings.append((time.perf_counter() - start) / number)
+    finally:
+        gc.enable()
+
+    with CaptureQueriesContext(connection) as queries:
+        run()
+
+    tracemalloc.start()
+    try:
+        run()
+        __, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        'mean': sum(timings) / len(timings),
+        'min': min(timings),
+        'max': max(timings),
+        'queries': len(queries) / float(number),
+        'peak_memory': peak,
+    }
+
+
+def run_benchmarks(sizes, repeat, only=None):
+    call_command('migrate', run_syncdb=True, verbosity=0)
+    results = []
+    for index, size in enumerate(sizes):
+        seed(size)
+        for bench in BENCHMARKS:
+            if only and not any(o in bench['name'] for o in only):
+                continue
+            if not bench['sized'] and index > 0:
+                continue
+            run = bench['setup'](size)
+            if run is None:
+                print('Skipping {} (missing dependency)'.format(bench['name']),
+                      file=sys.stderr)
+                continue
+            result = {
+                'name': bench['name'],
+                'size': size if bench['sized'] else None,
+                'number': bench['number'],
+                'repeat': repeat,
+            }
+            result.update(measure(run, bench['number'], repeat))
+            results.append(result)
+            print_result(result)
+    return results
+
+
+def print_result(result, baseline=None):
+    line = '{:<45} {:>8} {:>12.1f}us {:>8.1f}q {:>10}B'.format(
+        result['name'], result['size'] if result['size'] else '-',
+        result['mean'] * 1e6, result['queries'], result['peak_memory'])
+    if baseline:
+        line += ' {:>7.2f}x'.format(result['mean'] / baseline['mean'])
+    print(line, file=sys.stderr)
+
+
+def compare(results, baseline_results, threshold):
+    """
+    Print the results along with their ratio to the baseline and return the
+    results that are slower than ``threshold`` times their baseline.
+    """
+    baseline = {(r['name'], r['size']): r for r in baseline_results}
+    regressions = []
+    print('\nCompared to baseline:', file=sys.stderr)
+    for result in results:
+        base = baseline.get((result['name'], result['size']))
+        print_result(result, base)
+        if base and result['mean'] > base['mean'] * threshold:
+            regressions.append(result)
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        '--sizes', default='100,1000,10000',
+        help='Comma separated table sizes (default: 100,1000,10000).')
+    parser.add_argument(
+        '--repeat', type=int, default=5,
+        help='Number of timed runs per benchmark (default: 5).')
+    parser.add_argument(
+        '--only', action='append',
+        help='Only run the benchmarks whose name contains this.')
+    parser.add_argument(
+        '--output', help='Write the results as JSON to this file.')
+    parser.add_argument(
+        '--compare', metavar='BASELINE',
+        help='Compare the results to those in this JSON file.')
+    parser.add_argument(
+        '--threshold', type=float, default=1.2,
+        help='Ratio to the baseline above which a benchmark is considered '
+             'a regression (default: 1.2).')
+    args = parser.parse_args(argv)
+
+    sizes = [int(size) for size in args.sizes.split(',')]
+    report = {
+        'python': platform.python_version(),
+        'django': django.get_version(),
+        'date': datetime.datetime.utcnow().isoformat(),
+        'results': run_benchmarks(sizes, args.repeat, args.only),
+    }
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(
+            report['results'], baseline['results'], args.threshold)
+        if regressions:
+            print('\n{} regression(s) found'.format(len(regressions)),
+                  file=sys.stderr)
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
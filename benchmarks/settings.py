@@ -0,0 +1,35 @@
+# -*- coding: utf-8 -*-
+"""
+Minimal settings for running the benchmarks.
+"""
+SECRET_KEY = 'benchmarks'
+DEBUG = False
+USE_TZ = True
+USE_I18N = True
+LANGUAGE_CODE = 'en'
+LANGUAGES = [('en', 'English'), ('el', 'Greek'), ('de', 'German')]
+
+INSTALLED_APPS = [
+    'django.contrib.contenttypes',
+    'django.contrib.auth',
+    'groundworks',
+    'benchmarks',
+]
+
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': ':memory:',
+    },
+}
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+}
+
+ROOT_URLCONF = 'benchmarks.urls'
+ALLOWED_HOSTS = ['testserver']
+ADMINS = [('Admin', 'admin@example.com')]
+EMAIL_BACKEND = 'django.core.mail.backends.locmem.EmailBackend'
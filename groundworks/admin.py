@@ -4,8 +4,7 @@ from __future__ import unicode_literals
 from django.contrib import admin, messages
 from django.conf.urls import url
 from django.contrib.admin.utils import unquote
-from django.contrib.auth import update_session_auth_hash, get_user_model
-from django.contrib.auth.forms import AdminPasswordChangeForm
+from django.contrib.auth import update_session_auth_hash
 from django.core.exceptions import PermissionDenied
 from django.contrib.admin.options import IS_POPUP_VAR
 from django.http import Http404, HttpResponseRedirect
@@ -17,11 +16,11 @@ from django.utils.html import escape
 from django.utils.translation import ugettext, ugettext_lazy as _
 from django.views.decorators.debug import sensitive_post_parameters
 
-from groundworks.utils import has_edit_user_permissions
+from groundworks.utils import LazyUserModel, has_edit_user_permissions
 
 sensitive_post_parameters_m = method_decorator(sensitive_post_parameters())
 
-User = get_user_model()
+User = LazyUserModel()
 
 
 class DifferentAddAndChangeAdmin(admin.ModelAdmin):
@@ -71,7 +70,8 @@ class RelatedUserPasswordAdmin(admin.ModelAdmin):
     not a ManyToMany one.
     """
     change_user_password_template = None
-    change_password_form = AdminPasswordChangeForm
+    # Defaults to django.contrib.auth.forms.AdminPasswordChangeForm
+    change_password_form = None
 
     # Name of the field that holds the relation to User (ForeignKey, OneToOne)
     _user_rel_field = 'user'
@@ -83,6 +83,13 @@ class RelatedUserPasswordAdmin(admin.ModelAdmin):
         return super(RelatedUserPasswordAdmin, self) \
             .lookup_allowed(lookup, value)
 
+    def get_change_password_form(self):
+        if self.change_password_form is not None:
+            return self.change_password_form
+        # Imported here, since it needs the app registry to be ready
+        from django.contrib.auth.forms import AdminPasswordChangeForm
+        return AdminPasswordChangeForm
+
     @sensitive_post_parameters_m
     def user_change_password(self, request, id, form_url=''):
         if not self.has_change_permission(request) \
@@ -109,8 +116,9 @@ class RelatedUserPasswordAdmin(admin.ModelAdmin):
                 'user': force_text(User._meta.verbose_name),
             })
 
+        form_class = self.get_change_password_form()
         if request.method == 'POST':
-            form = self.change_password_form(user, request.POST)
+            form = form_class(user, request.POST)
             if form.is_valid():
                 form.save()
                 change_message = self.construct_change_message(
@@ -131,7 +139,7 @@ class RelatedUserPasswordAdmin(admin.ModelAdmin):
                     )
                 )
         else:
-            form = self.change_password_form(user)
+            form = form_class(user)
 
         fieldsets = [(None, {'fields': list(form.base_fields)})]
         adminForm = admin.helpers.AdminForm(form, fieldsets, {})
@@ -1,7 +1,13 @@
 from __future__ import unicode_literals
 
 from django.apps import AppConfig
+from django.conf import settings
 
 
 class GroundworksConfig(AppConfig):
     name = 'groundworks'
+
+    def ready(self):
+        if getattr(settings, 'GROUNDWORKS_INSTRUMENTATION', False):
+            from groundworks import instrumentation
+            instrumentation.enable()
@@ -0,0 +1,167 @@
+# -*- coding: utf-8 -*-
+"""
+Opt-in offloading of soft-deleted ``Undeletable`` rows to an archive table.
+
+Soft-deleted rows are kept in the table of their model forever, so that its
+indexes and scans grow along with the history. For models with an archive
+model, ``archive_deleted`` moves the rows that were deleted before a
+threshold to the archive table in batches, ``restore_archived`` moves them
+back and ``UndeletableQuerySet.deleted_with_archived`` returns the rows of
+both tables.
+
+Example:
+    # models.py
+    class Article(Undeletable):
+        ...
+
+    ArticleArchive = make_archive_model(Article)
+
+The archive model has to be created in the ``models`` module of the app of
+the model, so that its migrations are made as usual.
+"""
+from __future__ import unicode_literals
+
+import time
+
+from django.db import models, router, transaction
+from django.db.models.deletion import DO_NOTHING, \
+    get_candidate_relations_to_delete
+from django.utils import timezone
+
+
+def make_archive_model(model, name=None, db_table=None):
+    """
+    Create and return an archive model for ``model``, i.e. a model with a copy
+    of its concrete fields in a separate table, and register it as the archive
+    model of ``model``.
+
+    The copies of the fields are not unique and the relations do not have
+    database constraints or reverse accessors, so that the archived rows do
+    not restrict the live ones or the related ones.
+    """
+    opts = model._meta
+    if opts.parents:
+        raise ValueError(
+            'Archive models are not supported for models with multi-table '
+            'inheritance ({}).'.format(opts.label))
+
+    attrs = {'__module__': model.__module__}
+    for field in opts.concrete_fields:
+        if field.remote_field is not None:
+            # Not deconstructed, since that needs the app registry to be ready
+            attrs[field.name] = models.ForeignKey(
+                field.remote_field.model, on_delete=models.DO_NOTHING,
+                db_constraint=False, related_name='+',
+                to_field=field.remote_field.field_name,
+                db_column=field.column, null=field.null, blank=field.blank,
+                verbose_name=field.verbose_name)
+        else:
+            field_name, path, args, kwargs = field.deconstruct()
+            kwargs.pop('unique', None)
+            attrs[field_name] = field.__class__(*args, **kwargs)
+
+    attrs['Meta'] = type(str('Meta'), (), {
+        'app_label': opts.app_label,
+        'db_table': db_table or '{}_archive'.format(opts.db_table),
+    })
+    archive_model = type(
+        str(name or '{}Archive'.format(model.__name__)),
+        (models.Model,), attrs)
+    model._archive_model = archive_model
+    return archive_model
+
+
+def get_archive_model(model):
+    """
+    Return the archive model of ``model`` or ``None``.
+    """
+    return getattr(model, '_archive_model', None)
+
+
+def get_affected_relations(model):
+    """
+    Return the names of the relations to ``model`` whose rows would be
+    deleted, updated or would block the deletion of its rows, i.e. those that
+    are not ``on_delete=DO_NOTHING``, including generic relations.
+    """
+    relations = []
+    for related in get_candidate_relations_to_delete(model._meta):
+        if related.field.remote_field.on_delete is not DO_NOTHING:
+            relations.append(related.field.model._meta.label + '.' +
+                             related.field.name)
+    for field in model._meta.private_fields:
+        if hasattr(field, 'bulk_related_objects'):
+            relations.append(model._meta.label + '.' + field.name)
+    return relations
+
+
+def _move(source_queryset, target_model, using):
+    """
+    Copy the rows of ``source_queryset`` to ``target_model`` and delete them
+    from their table. Return the number of rows moved.
+    """
+    source_model = source_queryset.model
+    attnames = [field.attname for field in source_model._meta.concrete_fields]
+    rows = list(source_queryset.values(*attnames))
+    if not rows:
+        return 0
+    target_model._base_manager.db_manager(using).bulk_create(
+        [target_model(**row) for row in rows])
+    source_model._base_manager.db_manager(using) \
+        .filter(pk__in=[row[source_model._meta.pk.attname] for row in rows]) \
+        .delete()
+    return len(rows)
+
+
+def archive_deleted(model, older_than, batch_size=1000, sleep=0,
+                    using=None):
+    """
+    Move the rows of ``model`` that were (soft) deleted before ``older_than``
+    (a ``timedelta`` from now) to its archive model, in transactional batches
+    of ``batch_size`` rows. Return the number of rows moved.
+
+    Models with relations that would delete or update other rows along with
+    the archived ones (see ``get_affected_relations``) are refused, since
+    these rows would not be restored by ``restore_archived``.
+    """
+    archive_model = get_archive_model(model)
+    if archive_model is None:
+        raise ValueError('{} has no archive model.'.format(model._meta.label))
+    relations = get_affected_relations(model)
+    if relations:
+        raise ValueError(
+            '{} cannot be archived, since deleting its rows would affect the '
+            'rows of {} (only on_delete=DO_NOTHING is supported).'.format(
+                model._meta.label, ', '.join(relations)))
+    using = using or router.db_for_write(model)
+    cutoff = timezone.now() - older_than
+    queryset = model._base_manager.db_manager(using) \
+        .filter(date_deleted__lt=cutoff).order_by('pk')
+
+    total = 0
+    while True:
+        with transaction.atomic(using=using):
+            pks = list(queryset.select_for_update()
+                       .values_list('pk', flat=True)[:batch_size])
+            if not pks:
+                break
+            total += _move(queryset.filter(pk__in=pks), archive_model, using)
+        if sleep:
+            time.sleep(sleep)
+    return total
+
+
+def restore_archived(model, pks, using=None):
+    """
+    Move the rows of ``model`` with the primary keys ``pks`` from its archive
+    model back to its table, as they were (i.e. still deleted). Return the
+    number of rows moved.
+    """
+    archive_model = get_archive_model(model)
+    if archive_model is None:
+        raise ValueError('{} has no archive model.'.format(model._meta.label))
+    using = using or router.db_for_write(model)
+    with transaction.atomic(using=using):
+        queryset = archive_model._base_manager.db_manager(using) \
+            .filter(pk__in=list(pks))
+        return _move(queryset, model, using)
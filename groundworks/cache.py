@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+"""
+Caching of rendered fragments (e.g. the body or the metadata of an object)
+of ``TimeStamped`` instances, under keys that include ``date_updated``.
+
+Since every save of an instance changes its ``date_updated``, and therefore
+the keys of its fragments, the cached fragments never have to be invalidated
+explicitly; the stale ones are simply not asked for again and expire.
+"""
+from __future__ import unicode_literals
+
+import hashlib
+
+from django.core.cache import caches
+from django.utils.encoding import force_bytes, force_text
+from django.utils.translation import get_language
+
+
+def make_fragment_key(obj, fragment, language=None):
+    """
+    Return the cache key of the ``fragment`` (a name) of ``obj`` for
+    ``language`` (by default the active one), or ``None`` if ``obj`` has not
+    been saved yet.
+    """
+    if obj.pk is None or not obj.date_updated:
+        return None
+    language = language or get_language() or ''
+    return 'groundworks.fragment:{}:{}:{}:{}:{}'.format(
+        obj._meta.label_lower,
+        force_text(obj.pk),
+        obj.date_updated.strftime('%Y%m%d%H%M%S%f'),
+        language,
+        hashlib.md5(force_bytes(fragment)).hexdigest(),
+    )
+
+
+def get_fragment(obj, fragment, language=None, cache_alias='default'):
+    """
+    Return the cached ``fragment`` of ``obj`` or ``None``.
+    """
+    key = make_fragment_key(obj, fragment, language)
+    if key is None:
+        return None
+    return caches[cache_alias].get(key)
+
+
+def get_fragments(objs, fragment, language=None, cache_alias='default'):
+    """
+    Return a dictionary with the cached ``fragment`` of each of ``objs``,
+    keyed by their primary key, fetched with a single cache round-trip.
+    Instances without a cached fragment are missing from the dictionary.
+    """
+    keys = {}
+    for obj in objs:
+        key = make_fragment_key(obj, fragment, language)
+        if key is not None:
+            keys[key] = obj.pk
+    found = caches[cache_alias].get_many(list(keys))
+    return {keys[key]: value for key, value in found.items()}
+
+
+def set_fragment(obj, fragment, value, timeout=None, language=None,
+                 cache_alias='default'):
+    """
+    Cache ``value`` as the ``fragment`` of ``obj``. With a ``timeout`` of
+    ``None``, the default timeout of the cache is used.
+    """
+    key = make_fragment_key(obj, fragment, language)
+    if key is None:
+        return
+    if timeout is None:
+        caches[cache_alias].set(key, value)
+    else:
+        caches[cache_alias].set(key, value, timeout)
+
+
+def cached_fragment(obj, fragment, render, timeout=None, language=None,
+                    cache_alias='default'):
+    """
+    Return the cached ``fragment`` of ``obj``, or call ``render`` (without
+    any arguments) to render it and cache its result.
+
+    Example:
+        body = cached_fragment(
+            article, 'body', lambda: render_to_string('body.html', ctx))
+    """
+    value = get_fragment(obj, fragment, language, cache_alias)
+    if value is None:
+        value = render()
+        set_fragment(obj, fragment, value, timeout, language, cache_alias)
+    return value
@@ -7,9 +7,68 @@ from django.utils.translation import ugettext_lazy as _
 
 from ckeditor_uploader.fields import RichTextUploadingField
 
+from groundworks.utils import html_to_text, make_excerpt
+
 
 class RichText(models.Model):
+    """
+    Adds a rich text ``content`` field, along with its plain text, an excerpt
+    and its word count, so that these do not have to be derived from the
+    HTML on every use. The derived fields are updated on save, only when
+    ``content`` has changed.
+
+    For existing rows, use the ``backfill_richtext`` management command.
+    """
     content = RichTextUploadingField(_('content'), blank=True)
+    content_text = models.TextField(
+        _('content as plain text'), blank=True, editable=False)
+    content_excerpt = models.TextField(
+        _('content excerpt'), blank=True, editable=False)
+    content_word_count = models.PositiveIntegerField(
+        _('content word count'), default=0, editable=False)
+
+    _content_excerpt_length = 300
+    _content_derived_fields = (
+        'content_text', 'content_excerpt', 'content_word_count')
 
     class Meta:
         abstract = True
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super(RichText, cls).from_db(db, field_names, values)
+        if 'content' in field_names:
+            instance._loaded_content = instance.content
+        return instance
+
+    def save(self, *args, **kwargs):
+        if self.content_has_changed():
+            self.update_content_derivatives()
+            update_fields = kwargs.get('update_fields')
+            if update_fields is not None and 'content' in update_fields:
+                kwargs['update_fields'] = \
+                    set(update_fields) | set(self._content_derived_fields)
+        out = super(RichText, self).save(*args, **kwargs)
+        self._loaded_content = self.content
+        return out
+
+    def content_has_changed(self):
+        """
+        Check whether ``content`` differs from the one loaded from the
+        database (always true for instances not loaded from it).
+        """
+        if 'content' in self.get_deferred_fields():
+            return False
+        try:
+            return self.content != self._loaded_content
+        except AttributeError:
+            return True
+
+    def update_content_derivatives(self):
+        """
+        Set the fields derived from ``content``.
+        """
+        text = html_to_text(self.content)
+        self.content_text = text
+        self.content_excerpt = make_excerpt(text, self._content_excerpt_length)
+        self.content_word_count = len(text.split())
@@ -0,0 +1,187 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from django.core.cache import caches
+from django.db import transaction
+from django.utils.encoding import force_bytes, force_text
+
+
+class LocalLRUCache(object):
+    """
+    A small, thread safe, in-process LRU cache with a maximum size and an
+    optional timeout (in seconds) for its entries.
+    """
+
+    def __init__(self, maxsize=1024, timeout=None):
+        self.maxsize = maxsize
+        self.timeout = timeout
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            try:
+                value, expires = self._data.pop(key)
+            except KeyError:
+                return default
+            if expires is not None and expires < time.time():
+                return default
+            # Re-insert it, so that it becomes the most recently used
+            self._data[key] = (value, expires)
+            return value
+
+    def set(self, key, value):
+        expires = time.time() + self.timeout if self.timeout else None
+        with self._lock:
+            self._data.pop(key, None)
+            self._data[key] = (value, expires)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+class SlugCache(object):
+    """
+    Maps the slugs of a ``UUSlugged`` model to primary keys and back.
+
+    Lookups go through a bounded in-process LRU first and then through the
+    shared cache backend. The entries are updated when the transaction that
+    saves an instance commits and removed when it is deleted (see
+    ``UUSlugged``). Updates that bypass ``save``, like ``bulk_update`` or
+    ``QuerySet.update``, have to be followed by ``invalidate_slug_cache``;
+    those that are not, as well as those made in other processes for the
+    in-process LRU, are seen once the entries expire, after ``timeout`` and
+    ``local_timeout`` seconds respectively. The users of the mapping should
+    verify it where it matters, as ``UUSluggedQuerySet.get_by_slug`` does.
+    """
+
+    def __init__(self, model, maxsize=1024, local_timeout=300, timeout=None,
+                 cache_alias='default'):
+        self.model = model
+        self.timeout = timeout
+        self.cache_alias = cache_alias
+        self.local = LocalLRUCache(maxsize, local_timeout)
+        self.prefix = 'groundworks.slug:{}'.format(model._meta.label_lower)
+
+    @property
+    def shared(self):
+        return caches[self.cache_alias]
+
+    def _slug_key(self, slug):
+        # Slugs may be longer than what some backends accept as keys
+        digest = hashlib.md5(force_bytes(slug)).hexdigest()
+        return '{}:s:{}'.format(self.prefix, digest)
+
+    def _pk_key(self, pk):
+        return '{}:p:{}'.format(self.prefix, force_text(pk))
+
+    def _get(self, key):
+        value = self.local.get(key)
+        if value is None:
+            value = self.shared.get(key)
+            if value is not None:
+                self.local.set(key, value)
+        return value
+
+    def get_pk(self, slug):
+        """
+        Return the cached primary key for ``slug`` or ``None``.
+        """
+        return self._get(self._slug_key(slug))
+
+    def get_slug(self, pk):
+        """
+        Return the cached slug for ``pk`` or ``None``.
+        """
+        return self._get(self._pk_key(pk))
+
+    def set(self, pk, slug):
+        entries = {self._slug_key(slug): pk, self._pk_key(pk): slug}
+        for key, value in entries.items():
+            self.local.set(key, value)
+        self.shared.set_many(entries, self.timeout)
+
+    def invalidate(self, pk=None, slug=None):
+        """
+        Remove the entries for ``pk`` and/or ``slug``, along with the slug
+        that ``pk`` was mapped to.
+        """
+        keys = []
+        if pk is not None:
+            keys.append(self._pk_key(pk))
+            old_slug = self.get_slug(pk)
+            if old_slug is not None:
+                keys.append(self._slug_key(old_slug))
+        if slug is not None:
+            keys.append(self._slug_key(slug))
+        for key in keys:
+            self.local.delete(key)
+        self.shared.delete_many(keys)
+
+    def invalidate_many(self, pks):
+        """
+        Remove the entries for all the primary keys ``pks``, along with the
+        slugs that they were mapped to.
+        """
+        pk_keys = [self._pk_key(pk) for pk in pks]
+        old_slugs = set(self.shared.get_many(pk_keys).values())
+        old_slugs.update(self.local.get(key) for key in pk_keys)
+        old_slugs.discard(None)
+        keys = pk_keys + [self._slug_key(slug) for slug in old_slugs]
+        for key in keys:
+            self.local.delete(key)
+        self.shared.delete_many(keys)
+
+
+_slug_caches = {}
+_slug_caches_lock = threading.Lock()
+
+
+def get_slug_cache(model):
+    """
+    Return the ``SlugCache`` of ``model``, creating it if needed, according
+    to the ``_slug_cache_*`` attributes of the model.
+    """
+    model = model._meta.concrete_model
+    try:
+        return _slug_caches[model]
+    except KeyError:
+        with _slug_caches_lock:
+            if model not in _slug_caches:
+                _slug_caches[model] = SlugCache(
+                    model,
+                    maxsize=model._slug_cache_size,
+                    local_timeout=model._slug_cache_local_timeout,
+                    timeout=model._slug_cache_timeout,
+                    cache_alias=model._slug_cache_alias,
+                )
+            return _slug_caches[model]
+
+
+def invalidate_slug_cache(model, pks, using=None):
+    """
+    Remove the cached slugs of the instances of ``model`` with the primary
+    keys ``pks``, after updating their slugs without ``UUSlugged.save``.
+
+    This happens right away and once more when the current transaction of
+    ``using`` commits, so that the old slugs that may have been cached in the
+    meantime are removed as well.
+    """
+    pks = list(pks)
+    if not pks:
+        return
+    slug_cache = get_slug_cache(model)
+    slug_cache.invalidate_many(pks)
+    transaction.on_commit(lambda: slug_cache.invalidate_many(pks), using=using)
@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import models
+
+from groundworks.contrib.uuslug.cache import get_slug_cache
+
+
+class UUSluggedQuerySet(models.QuerySet):
+    """
+    A ``QuerySet`` for ``UUSlugged`` models.
+    """
+
+    def get_by_slug(self, slug):
+        """
+        Return the instance with the given slug, fetching it by primary key if
+        the slug has been resolved before.
+
+        The cached primary key is verified against the slug of the fetched
+        instance, so stale entries fall back to a lookup by slug.
+        """
+        slug_cache = get_slug_cache(self.model)
+        pk = slug_cache.get_pk(slug)
+        if pk is not None:
+            try:
+                obj = self.get(pk=pk)
+            except self.model.DoesNotExist:
+                pass
+            else:
+                if obj.slug == slug:
+                    return obj
+                slug_cache.invalidate(pk=pk, slug=slug)
+        obj = self.get(slug=slug)
+        slug_cache.set(obj.pk, obj.slug)
+        return obj
+
+    def get_slug_for_pk(self, pk):
+        """
+        Return the slug of the instance with primary key ``pk``, e.g. for
+        building its URL without fetching it. Raise ``DoesNotExist`` if there
+        is no such instance.
+
+        The cached slug is not verified, so updates that bypass
+        ``UUSlugged.save`` have to be followed by ``invalidate_slug_cache``
+        in order to be seen before the entry expires.
+        """
+        slug_cache = get_slug_cache(self.model)
+        slug = slug_cache.get_slug(pk)
+        if slug is None:
+            slug = self.values_list('slug', flat=True).get(pk=pk)
+            slug_cache.set(pk, slug)
+        return slug
+
+
+class UUSluggedManager(models.Manager):
+    """
+    A ``Manager`` for ``UUSlugged`` models.
+
+    This is not set on ``UUSlugged`` itself, so that it does not take the
+    place of the managers of the other mixins. Set it explicitly, or combine
+    ``UUSluggedQuerySet`` with the ``QuerySet`` of another mixin.
+    """
+
+    def get_queryset(self):
+        return UUSluggedQuerySet(self.model, using=self._db)
+
+    def get_by_slug(self, slug):
+        return self.get_queryset().get_by_slug(slug)
+
+    def get_slug_for_pk(self, pk):
+        return self.get_queryset().get_slug_for_pk(pk)
@@ -1,17 +1,23 @@
 # -*- coding: utf-8 -*-
 from __future__ import unicode_literals
 
-from django.db import models, IntegrityError
+from django.db import models, router, transaction, IntegrityError
+from django.utils import six
 from django.utils.encoding import python_2_unicode_compatible
 from django.utils.translation import ugettext_lazy as _
 
-from uuslug import uuslug
+from groundworks.contrib.uuslug import utils
+from groundworks.contrib.uuslug.cache import get_slug_cache
 
 
 @python_2_unicode_compatible
 class UUSlugged(models.Model):
     """
-    Adds a slug field, with a unique constraint and uses django-uuslug on it.
+    Adds a slug field, with a unique constraint and fills it with a unique
+    slug, made with the ``slugify`` of django-uuslug.
+
+    See ``groundworks.contrib.uuslug.utils.allocate_slugs`` for how the
+    uniqueness of the slug is ensured.
     """
     slug = models.SlugField(
         _('partial URL'), max_length=255, unique=True, blank=True,
@@ -20,26 +26,69 @@ class UUSlugged(models.Model):
                     'to make it unique.'))
 
     _slug_source = 'title'  # A common case field, which is not given here.
+    _slug_allocation_attempts = 3
+    # Options of the slug <-> primary key cache, see UUSluggedManager
+    _slug_cache_size = 1024
+    _slug_cache_local_timeout = 300
+    _slug_cache_timeout = 3600
+    _slug_cache_alias = 'default'
 
     class Meta:
         abstract = True
 
-    def generate_slug(self, source=''):
+    def generate_slug(self, source='', using=None):
         if not source:
             source = getattr(self, self._slug_source)
-        return uuslug(source, instance=self)
+        return utils.allocate_slugs([self], sources=[source], using=using)[0]
 
     def save(self, *args, **kwargs):
-        if not self.pk:
-            if self.slug:
-                # A slug has been defined elsewhere, try to go with it
-                try:
+        if self.pk:
+            out = super(UUSlugged, self).save(*args, **kwargs)
+            slug_cache = get_slug_cache(self.__class__)
+            if slug_cache.get_slug(self.pk) != self.slug:
+                slug_cache.invalidate(pk=self.pk)
+                self._cache_slug_on_commit()
+            return out
+
+        # A slug that has been defined elsewhere is kept if it is free,
+        # otherwise it is used as a slug source, since it would be closer to
+        # the already defined slug. If a concurrent insert grabs the slug in
+        # the meantime, a new one is allocated.
+        using = kwargs.get('using') or \
+            router.db_for_write(self.__class__, instance=self)
+        initial = self.slug
+        for attempt in six.moves.range(self._slug_allocation_attempts):
+            self.slug = initial
+            self.slug = utils.allocate_slugs([self], using=using)[0]
+            try:
+                with transaction.atomic(using=using):
                     out = super(UUSlugged, self).save(*args, **kwargs)
-                except IntegrityError:
-                    # The slug is not unique, try to use it as a slug source
-                    # for uuslug though, since it would be closer to the
-                    # already defined slug.
-                    self.slug = self.generate_slug(self.slug)
+            except IntegrityError:
+                if attempt == self._slug_allocation_attempts - 1:
+                    raise
             else:
-                self.slug = self.generate_slug()
-        return super(UUSlugged, self).save(*args, **kwargs)
+                self._cache_slug_on_commit()
+                return out
+
+    def delete(self, *args, **kwargs):
+        pk, slug, using = self.pk, self.slug, self._state.db
+        out = super(UUSlugged, self).delete(*args, **kwargs)
+        slug_cache = get_slug_cache(self.__class__)
+        slug_cache.invalidate(pk=pk, slug=slug)
+        transaction.on_commit(
+            lambda: slug_cache.invalidate(pk=pk, slug=slug), using=using)
+        return out
+
+    def _cache_slug_on_commit(self):
+        """
+        Cache the slug of this instance once the transaction that saved it
+        commits, so that a rollback does not leave a slug that was never
+        saved in the cache.
+        """
+        slug_cache = get_slug_cache(self.__class__)
+        pk, slug = self.pk, self.slug
+
+        def cache_slug():
+            slug_cache.invalidate(pk=pk)
+            slug_cache.set(pk, slug)
+        transaction.on_commit(cache_slug, using=self._state.db)
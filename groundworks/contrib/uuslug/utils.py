@@ -0,0 +1,165 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import IntegrityError, models, router, transaction
+from django.utils import six
+from django.utils.encoding import force_text
+
+from groundworks.utils import bulk_insert
+
+# Room left at the end of a truncated base slug for the separator and the
+# counter, so that the prefix query covers counters of up to 9 digits.
+_COUNTER_ROOM = 10
+
+
+def _slug_max_length(model, slug_field):
+    return model._meta.get_field(slug_field).max_length
+
+
+def _with_counter(base, counter, max_length, separator):
+    suffix = '{}{}'.format(separator, counter)
+    if len(base) + len(suffix) > max_length:
+        # Like uuslug, a truncated base does not end with a separator
+        base = base[:max_length - len(suffix)].strip(separator)
+    return '{}{}'.format(base, suffix)
+
+
+def _query_prefix(base, max_length):
+    """
+    Return the prefix shared by ``base`` and all of its numbered variants,
+    taking into account that these may have been truncated.
+    """
+    if len(base) > max_length - _COUNTER_ROOM:
+        return base[:max(max_length - _COUNTER_ROOM, 1)]
+    return base
+
+
+def get_taken_slugs(model, prefixes, exclude=(), slug_field='slug',
+                    using=None):
+    """
+    Return the set of the existing slugs of ``model`` that start with any of
+    the ``prefixes``, fetched with a single query.
+    """
+    # An empty prefix would match (and fetch) every slug of the table
+    prefixes = set(prefix for prefix in prefixes if prefix)
+    if not prefixes:
+        return set()
+    query = models.Q()
+    for prefix in prefixes:
+        query |= models.Q(**{'{}__startswith'.format(slug_field): prefix})
+    queryset = model._default_manager.db_manager(using).filter(query)
+    exclude = [pk for pk in exclude if pk is not None]
+    if exclude:
+        queryset = queryset.exclude(pk__in=exclude)
+    return set(queryset.values_list(slug_field, flat=True))
+
+
+def make_slug_base(source, max_length, separator='-'):
+    """
+    Return the slug for ``source``, before making it unique.
+    """
+    # Imported here, since it brings in python-slugify and its
+    # transliteration tables, which are not needed until a slug is made
+    from uuslug import slugify
+    return slugify(force_text(source), max_length=max_length,
+                   separator=separator)
+
+
+def allocate_slugs(instances, sources=None, slug_field='slug', separator='-',
+                   using=None, bases=None):
+    """
+    Allocate unique slugs for ``instances`` (all of the same model) and return
+    them in a list, in the same order. The slugs are not set on the instances.
+
+    The slugs are derived from ``sources`` (one for each instance) or from
+    the ``_slug_source`` field of each instance. When no ``sources`` are
+    given, an instance that already has a slug keeps it if it is not taken;
+    otherwise it is used as the source.
+    Colliding slugs get a ``-<counter>`` suffix, exactly like ``uuslug``.
+
+    All existing slugs that share a prefix with the new ones are fetched in a
+    single query and the free ones are picked in memory, taking into account
+    the slugs allocated for the rest of the batch as well. This does not
+    reserve anything, so concurrent inserts may still grab the same slugs;
+    see ``bulk_create_slugged`` for dealing with that.
+
+    The slugs of the sources may be given in ``bases`` (as returned by
+    ``make_slug_base``), if they have been made elsewhere. Sources without a
+    slug (e.g. with punctuation or emoji only) get the name of the model as
+    their base.
+    """
+    instances = list(instances)
+    if not instances:
+        return []
+    model = instances[0].__class__
+    max_length = _slug_max_length(model, slug_field)
+
+    wanted = []
+    for index, instance in enumerate(instances):
+        # Explicit sources take precedence over the current slug
+        current = getattr(instance, slug_field) if sources is None else None
+        if sources is not None:
+            source = sources[index]
+        elif current:
+            source = current
+        else:
+            source = getattr(instance, instance._slug_source)
+        if bases is not None:
+            base = bases[index]
+        else:
+            base = make_slug_base(source, max_length, separator)
+        if not base:
+            base = model._meta.model_name[:max_length]
+        wanted.append((current, base))
+
+    prefixes = [_query_prefix(base, max_length) for __, base in wanted]
+    prefixes += [current for current, __ in wanted if current]
+    taken = get_taken_slugs(
+        model, prefixes, exclude=[obj.pk for obj in instances],
+        slug_field=slug_field, using=using)
+
+    slugs = []
+    counters = {}
+    for current, base in wanted:
+        if current and current not in taken:
+            slug = current
+        elif base not in taken:
+            slug = base
+        else:
+            counter = counters.get(base, 1)
+            slug = _with_counter(base, counter, max_length, separator)
+            while slug in taken:
+                counter += 1
+                slug = _with_counter(base, counter, max_length, separator)
+            counters[base] = counter + 1
+        taken.add(slug)
+        slugs.append(slug)
+    return slugs
+
+
+def bulk_create_slugged(model, instances, using=None, batch_size=None,
+                        attempts=3):
+    """
+    Allocate slugs for the unsaved ``instances`` of a ``UUSlugged`` model and
+    create them with ``bulk_insert``.
+
+    The insert happens in a savepoint, so if a concurrent insert took one of
+    the allocated slugs in the meantime, the slugs are allocated again and the
+    insert is retried, up to ``attempts`` times.
+    """
+    instances = list(instances)
+    using = using or router.db_for_write(model)
+    initial = [instance.slug for instance in instances]
+    for attempt in six.moves.range(attempts):
+        for instance, slug in zip(instances, initial):
+            instance.slug = slug
+        slugs = allocate_slugs(instances, using=using)
+        for instance, slug in zip(instances, slugs):
+            instance.slug = slug
+        try:
+            with transaction.atomic(using=using):
+                return bulk_insert(
+                    model, instances, using=using, batch_size=batch_size)
+        except IntegrityError:
+            if attempt == attempts - 1:
+                raise
@@ -2,12 +2,14 @@
 from __future__ import unicode_literals
 
 from django import forms
-from django.contrib.auth import get_user_model
-from django.utils import six
+from django.db import router, transaction
+from django.utils import six, timezone
 from django.utils.translation import ugettext_lazy as _
 
+from groundworks.utils import LazyUserModel, bulk_insert
 
-User = get_user_model()
+
+User = LazyUserModel()
 
 
 class UserFieldsIncludedMixin(forms.ModelForm):
@@ -48,20 +50,29 @@ class UserFieldsIncludedMixin(forms.ModelForm):
         instance = super(UserFieldsIncludedMixin, self) \
             .save(commit=False)
         data = self.cleaned_data
+        is_new_user = self._user.pk is None
+        changed_fields = []
 
         for field in self._user_fields:
-            setattr(self._user, field, data[field])
+            if field == self._user_password_field:
+                continue
+            if is_new_user or getattr(self._user, field) != data[field]:
+                setattr(self._user, field, data[field])
+                changed_fields.append(field)
 
-        if self._user_password_field in self._user_fields:
-            self._user.set_password(
-                self.cleaned_data[self._user_password_field]
-            )
+        if self._user_password_field in self._user_fields \
+                and self._has_new_password():
+            self._user.set_password(data[self._user_password_field])
+            changed_fields.append(self._user_password_field)
 
         # NOTE: Since django 1.8+ does not allow the relation to unsaved
         #       models, we save the User instance before assigning it to the
         #       relative field. This is a bit counterintuitive when commit is
         #       False, but it seems to be a necessary evil.
-        self._user.save()
+        if is_new_user:
+            self._user.save()
+        elif changed_fields:
+            self._user.save(update_fields=changed_fields)
         setattr(instance, self._user_rel_field, self._user)
 
         if commit:
@@ -69,6 +80,20 @@ class UserFieldsIncludedMixin(forms.ModelForm):
 
         return instance
 
+    def _has_new_password(self):
+        """
+        Check whether a new password was actually submitted.
+
+        An empty value or the stored hash itself (which is what the initial
+        value of the field is) mean that the password was left untouched, so
+        there is no need to pay for the hashing.
+        """
+        password = self.cleaned_data[self._user_password_field]
+        if self._user.pk is None:
+            return True
+        return bool(password) and \
+            password != getattr(self._user, self._user_password_field)
+
 
 class MultiSourceFieldsFormMixin(object):
     """
@@ -167,3 +192,133 @@ class RenamedFieldsMixin(object):
             '{}._renamed_fields has not been set'
             .format(self.__class__.__name__)
         )
+
+
+class BulkSaveModelFormSet(forms.BaseModelFormSet):
+    """
+    A ``BaseModelFormSet`` that saves all of its instances with a constant
+    number of queries, instead of calling each form's ``save``. On databases
+    that cannot return the primary keys from a bulk insert (e.g. SQLite and
+    MySQL) the new instances are still inserted one by one.
+
+    The pre-save logic of the groundworks mixins (``TimeStamped``,
+    ``WithEnforcedValues``, ``WithMetadata`` and the ``RichText`` of
+    ``groundworks.contrib.ckeditor``) is run for all instances and the
+    slugs of new ``UUSlugged`` instances are allocated in batch, before they
+    are persisted via ``bulk_insert`` and ``bulk_update``, inside a single
+    transaction. Note that this means that the ``save`` method of the model
+    and the ``pre_save``/``post_save`` signals are *not* called for the
+    instances, so any other logic found there has to be added to
+    ``prepare_instances``.
+
+    Example:
+        ArticleFormSet = modelformset_factory(
+            Article, formset=BulkSaveModelFormSet, fields=('title', 'body'))
+    """
+
+    def save(self, commit=True):
+        if not commit:
+            return super(BulkSaveModelFormSet, self).save(commit=False)
+
+        using = router.db_for_write(self.model)
+        with transaction.atomic(using=using):
+            # Collect the new, changed and deleted instances without saving
+            # any of them. This also sets up ``self.save_m2m``.
+            super(BulkSaveModelFormSet, self).save(commit=False)
+            changed_objects = [obj for obj, __ in self.changed_objects]
+            self.bulk_delete(self.deleted_objects, using)
+            self.bulk_save_new(self.new_objects, using)
+            self.bulk_save_existing(
+                changed_objects, self._get_changed_fields(), using)
+            self.save_m2m()
+        return changed_objects + self.new_objects
+
+    def prepare_instances(self, instances):
+        """
+        Run the pre-save logic of the groundworks mixins on ``instances`` and
+        return the names of the fields that it may have changed.
+        """
+        # Imported here, so that this module can be imported before the app
+        # registry is ready
+        from groundworks.models import TimeStamped, WithEnforcedValues, \
+            WithMetadata
+        fields = set()
+        for instance in instances:
+            if isinstance(instance, WithEnforcedValues):
+                instance.enforce_values()
+                fields.update(instance._enforced_values)
+            if isinstance(instance, TimeStamped):
+                instance.update_timestamps()
+                fields.update(['date_created', 'date_updated'])
+            # Checked by attribute, so that django-ckeditor is not required
+            if hasattr(instance, 'update_content_derivatives') and \
+                    instance.content_has_changed():
+                instance.update_content_derivatives()
+                fields.update(instance._content_derived_fields)
+            if isinstance(instance, WithMetadata):
+                instance.meta_description = \
+                    instance.generate_meta_description()
+                fields.add('meta_description')
+        return fields
+
+    def bulk_save_new(self, instances, using):
+        self.prepare_instances(instances)
+        if hasattr(self.model, 'generate_slug'):
+            # Imported here, so that django-uuslug is not required otherwise
+            from groundworks.contrib.uuslug.utils import bulk_create_slugged
+            bulk_create_slugged(self.model, instances, using=using)
+        else:
+            bulk_insert(self.model, instances, using=using)
+
+    def bulk_save_existing(self, instances, fields, using):
+        fields = set(fields) | self.prepare_instances(instances)
+        if instances and fields:
+            self.model._default_manager.db_manager(using) \
+                .bulk_update(instances, self._concrete_field_names(fields))
+            if 'slug' in fields:
+                self._invalidate_slug_cache(instances, using)
+
+    def bulk_delete(self, instances, using):
+        from groundworks.models import TimeStamped, Undeletable
+        if not instances:
+            return
+        pks = [obj.pk for obj in instances]
+        queryset = self.model._default_manager.db_manager(using) \
+            .filter(pk__in=pks)
+        if issubclass(self.model, Undeletable):
+            now = timezone.now()
+            values = {'date_deleted': now}
+            if issubclass(self.model, TimeStamped):
+                values['date_updated'] = now
+            queryset.update(**values)
+        else:
+            queryset.delete()
+            self._invalidate_slug_cache(instances, using)
+
+    def _invalidate_slug_cache(self, instances, using):
+        """
+        Remove the cached slugs of ``instances`` of ``UUSlugged`` models,
+        since they are saved without ``UUSlugged.save``.
+        """
+        if not hasattr(self.model, 'generate_slug'):
+            return
+        from groundworks.contrib.uuslug.cache import invalidate_slug_cache
+        invalidate_slug_cache(
+            self.model, [obj.pk for obj in instances], using=using)
+
+    def _get_changed_fields(self):
+        fields = set()
+        for __, changed_data in self.changed_objects:
+            fields.update(changed_data)
+        return fields
+
+    def _concrete_field_names(self, fields):
+        """
+        Filter ``fields`` down to the names that ``bulk_update`` can handle,
+        i.e. concrete, non primary key and non many-to-many fields.
+        """
+        names = []
+        for field in self.model._meta.concrete_fields:
+            if field.name in fields and not field.primary_key:
+                names.append(field.name)
+        return names
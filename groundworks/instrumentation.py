@@ -0,0 +1,258 @@
+# -*- coding: utf-8 -*-
+"""
+Opt-in instrumentation of the groundworks managers, querysets and mixins.
+
+When enabled, either by calling ``enable`` or by setting
+``GROUNDWORKS_INSTRUMENTATION = True`` in the settings, the methods listed in
+``INSTRUMENTED_METHODS`` are replaced with wrappers that measure the number
+of queries, the time spent in SQL and the wall time of each call. Every
+measurement is sent with the ``method_instrumented`` signal and, while a
+``InstrumentationMiddleware`` is processing a request, it is added to the
+breakdown of that request.
+
+The methods of the mixins call each other through ``super()`` (e.g. the
+``save`` of ``TimeStamped``, ``WithMetadata`` etc), so only the outermost
+instrumented call on a model instance is measured, under the name of the
+concrete model (e.g. ``Article.save``). The slug allocation of
+``UUSlugged`` is measured on its own as well, as ``allocate_slugs``.
+
+When disabled, the original methods are in place, so there is no overhead
+at all.
+
+NOTE: The queryset methods (e.g. ``published``) are lazy, so they are
+      measured when the querysets that they return are fetched (iterated,
+      ``len``, ``list`` etc), not when they are called. Queries made via
+      ``count``, ``exists`` and the like are not attributed to them.
+"""
+from __future__ import unicode_literals
+
+import functools
+import importlib
+import threading
+from contextlib import contextmanager
+from timeit import default_timer as timer
+
+from django.db import connections, models
+from django.dispatch import Signal
+
+method_instrumented = Signal(
+    providing_args=['name', 'queries', 'sql_time', 'wall_time'])
+
+# (module, class or None for functions, method, is lazy queryset method)
+INSTRUMENTED_METHODS = [
+    ('groundworks.managers', 'ActivatableQuerySet', 'active', True),
+    ('groundworks.managers', 'TimeStampedQuerySet', 'newest', True),
+    ('groundworks.managers', 'PublishableQuerySet', 'draft', True),
+    ('groundworks.managers', 'PublishableQuerySet', 'published', True),
+    ('groundworks.managers', 'PublishableQuerySet', 'published_before', True),
+    ('groundworks.managers', 'PublishableQuerySet', 'published_after', True),
+    ('groundworks.managers', 'PublishableQuerySet', 'published_between',
+     True),
+    ('groundworks.managers', 'UndeletableQuerySet', 'deleted', True),
+    ('groundworks.managers', 'UndeletableQuerySet', 'not_deleted', True),
+    ('groundworks.managers', 'RandomizingManager', 'get_random', False),
+    ('groundworks.models', 'TimeStamped', 'save', False),
+    ('groundworks.models', 'WithMetadata', 'save', False),
+    ('groundworks.models', 'WithEnforcedValues', 'save', False),
+    ('groundworks.models', 'Undeletable', 'delete', False),
+    ('groundworks.contrib.uuslug.models', 'UUSlugged', 'save', False),
+    ('groundworks.contrib.uuslug.models', 'UUSlugged', 'generate_slug',
+     False),
+    ('groundworks.contrib.uuslug.managers', 'UUSluggedQuerySet',
+     'get_by_slug', False),
+    ('groundworks.contrib.uuslug.utils', None, 'allocate_slugs', False),
+    ('groundworks.contrib.ckeditor.models', 'RichText', 'save', False),
+]
+
+_originals = {}
+_lock = threading.Lock()
+_local = threading.local()
+
+
+def is_enabled():
+    return bool(_originals)
+
+
+@contextmanager
+def measure(name, sender):
+    """
+    Measure the queries and the time of the enclosed block, send them with
+    ``method_instrumented`` and add them to the breakdown of the current
+    request, if any.
+    """
+    stats = {'queries': 0, 'sql_time': 0.0}
+
+    def execute_wrapper(execute, sql, params, many, context):
+        start = timer()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            stats['queries'] += 1
+            stats['sql_time'] += timer() - start
+
+    wrappers = [conn.execute_wrapper(execute_wrapper)
+                for conn in connections.all()]
+    start = timer()
+    for wrapper in wrappers:
+        wrapper.__enter__()
+    try:
+        yield
+    finally:
+        for wrapper in reversed(wrappers):
+            wrapper.__exit__(None, None, None)
+        wall_time = timer() - start
+        record(name, stats['queries'], stats['sql_time'], wall_time)
+        method_instrumented.send(
+            sender=sender, name=name, queries=stats['queries'],
+            sql_time=stats['sql_time'], wall_time=wall_time)
+
+
+def record(name, queries, sql_time, wall_time):
+    breakdown = getattr(_local, 'breakdown', None)
+    if breakdown is None:
+        return
+    entry = breakdown.setdefault(
+        name, {'calls': 0, 'queries': 0, 'sql_time': 0.0, 'wall_time': 0.0})
+    entry['calls'] += 1
+    entry['queries'] += queries
+    entry['sql_time'] += sql_time
+    entry['wall_time'] += wall_time
+
+
+def start_breakdown():
+    """
+    Start collecting the measurements made in this thread.
+    """
+    _local.breakdown = {}
+
+
+def stop_breakdown():
+    """
+    Stop collecting measurements and return those collected since
+    ``start_breakdown``, keyed by the name of the method.
+    """
+    breakdown = getattr(_local, 'breakdown', None) or {}
+    _local.breakdown = None
+    return breakdown
+
+
+def _sender(obj):
+    if isinstance(obj, models.Model):
+        return obj.__class__
+    return obj.model
+
+
+def _wrap_eager(name, method):
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        # Only the outermost instrumented call on an object is measured, so
+        # that the calls of the mixins through super() are counted once
+        active = getattr(_local, 'active', None)
+        if active is None:
+            active = _local.active = set()
+        if id(self) in active:
+            return method(self, *args, **kwargs)
+        call_name = name
+        if isinstance(self, models.Model):
+            call_name = '{}.{}'.format(
+                self.__class__.__name__, method.__name__)
+        active.add(id(self))
+        try:
+            with measure(call_name, _sender(self)):
+                return method(self, *args, **kwargs)
+        finally:
+            active.discard(id(self))
+    return wrapper
+
+
+def _wrap_function(name, function):
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        with measure(name, function):
+            return function(*args, **kwargs)
+    return wrapper
+
+
+def _wrap_lazy(name, method):
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        queryset = method(self, *args, **kwargs)
+        queryset._instrumented_as = name
+        return queryset
+    return wrapper
+
+
+def _patch(cls, name, replacement):
+    # Only the attributes of the class (or module) itself are restored, not
+    # inherited ones
+    _originals[(cls, name)] = cls.__dict__.get(name)
+    setattr(cls, name, replacement)
+
+
+def _patch_queryset(cls):
+    """
+    Make the querysets of ``cls`` keep the name of the instrumented method
+    that created them across clones and measure their fetching.
+    """
+    if (cls, '_fetch_all') in _originals:
+        return
+    original_clone = cls._clone
+    original_fetch_all = cls._fetch_all
+
+    def _clone(self, *args, **kwargs):
+        clone = original_clone(self, *args, **kwargs)
+        clone._instrumented_as = getattr(self, '_instrumented_as', None)
+        return clone
+
+    def _fetch_all(self):
+        name = getattr(self, '_instrumented_as', None)
+        if name is None or self._result_cache is not None:
+            return original_fetch_all(self)
+        with measure(name, self.model):
+            return original_fetch_all(self)
+
+    _patch(cls, '_clone', _clone)
+    _patch(cls, '_fetch_all', _fetch_all)
+
+
+def enable():
+    """
+    Replace the methods in ``INSTRUMENTED_METHODS`` with instrumented ones.
+    The methods of modules that cannot be imported (e.g. because of missing
+    optional dependencies) are skipped.
+    """
+    with _lock:
+        if _originals:
+            return
+        for module_name, class_name, method_name, lazy in \
+                INSTRUMENTED_METHODS:
+            try:
+                module = importlib.import_module(module_name)
+            except ImportError:
+                continue
+            if class_name is None:
+                function = getattr(module, method_name)
+                _patch(module, method_name,
+                       _wrap_function(method_name, function))
+                continue
+            cls = getattr(module, class_name)
+            name = '{}.{}'.format(class_name, method_name)
+            method = getattr(cls, method_name)
+            if lazy:
+                _patch_queryset(cls)
+                _patch(cls, method_name, _wrap_lazy(name, method))
+            else:
+                _patch(cls, method_name, _wrap_eager(name, method))
+
+
+def disable():
+    """
+    Restore the original methods.
+    """
+    with _lock:
+        for (cls, name), original in _originals.items():
+            if original is None:
+                delattr(cls, name)
+            else:
+                setattr(cls, name, original)
+        _originals.clear()
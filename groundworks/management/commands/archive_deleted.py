@@ -0,0 +1,49 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import datetime
+
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+
+from groundworks.archiving import archive_deleted, get_archive_model
+
+
+class Command(BaseCommand):
+    help = ('Moves the rows of Undeletable models that were deleted before a '
+            'number of days to their archive tables, in batches.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'models', nargs='+', metavar='app_label.ModelName',
+            help='The Undeletable models with archive models to archive.')
+        parser.add_argument(
+            '--days', type=int, default=90,
+            help='Archive rows deleted more than this many days ago '
+                 '(default: 90).')
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Number of rows to move per transaction (default: 1000).')
+        parser.add_argument(
+            '--sleep', type=float, default=0,
+            help='Seconds to sleep between batches (default: 0).')
+        parser.add_argument(
+            '--database', default=None,
+            help='The database to use (default: the one of the router).')
+
+    def handle(self, *args, **options):
+        older_than = datetime.timedelta(days=options['days'])
+        for label in options['models']:
+            try:
+                model = apps.get_model(label)
+            except (LookupError, ValueError) as e:
+                raise CommandError(e)
+            if get_archive_model(model) is None:
+                raise CommandError('{} has no archive model'.format(label))
+            try:
+                count = archive_deleted(
+                    model, older_than, batch_size=options['batch_size'],
+                    sleep=options['sleep'], using=options['database'])
+            except ValueError as e:
+                raise CommandError(e)
+            self.stdout.write('{}: {} rows archived'.format(label, count))
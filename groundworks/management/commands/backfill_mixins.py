@@ -0,0 +1,292 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import io
+import json
+import multiprocessing
+import os
+import time
+
+import django
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+from django.db import IntegrityError, connections, router, transaction
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from groundworks.models import TimeStamped, Undeletable, WithMetadata
+
+MIXINS = ('timestamped', 'uuslugged', 'metadata', 'undeletable')
+
+
+def _init_worker():
+    # Needed when the worker processes are spawned, instead of forked
+    if not apps.ready:
+        django.setup()
+
+
+def _make_slug_bases(args):
+    from groundworks.contrib.uuslug.utils import make_slug_base
+    sources, max_length = args
+    return [make_slug_base(source, max_length) for source in sources]
+
+
+def _make_meta_descriptions(instances):
+    return [instance.generate_meta_description() for instance in instances]
+
+
+class Command(BaseCommand):
+    help = ('Backfills the fields of the groundworks mixins (TimeStamped, '
+            'UUSlugged, WithMetadata, Undeletable) that have been added to a '
+            'model with existing rows, in resumable batches.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'model', metavar='app_label.ModelName',
+            help='The model to backfill.')
+        parser.add_argument(
+            '--mixins',
+            help='Comma separated mixins to backfill, out of {} (default: all '
+                 'the ones that the model uses).'.format(', '.join(MIXINS)))
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Number of rows per batch (default: 1000).')
+        parser.add_argument(
+            '--sleep', type=float, default=0,
+            help='Seconds to sleep between batches (default: 0).')
+        parser.add_argument(
+            '--workers', type=int, default=0,
+            help='Number of processes for deriving slugs and meta '
+                 'descriptions (default: 0, i.e. in this process).')
+        parser.add_argument(
+            '--state-file',
+            help='Keep the progress in this file, so that an interrupted '
+                 'backfill resumes where it stopped.')
+        parser.add_argument(
+            '--timestamp',
+            help='The ISO 8601 datetime to set for missing timestamps '
+                 '(default: now).')
+        parser.add_argument(
+            '--placeholder',
+            help='For TimeStamped, the ISO 8601 datetime that the migration '
+                 'set as the default of date_created and date_updated for '
+                 'the existing rows; the rows that still have it are '
+                 'backfilled. Without it, only the rows where they are NULL '
+                 'are, so the fields have to be added as nullable first.')
+        parser.add_argument(
+            '--deleted-flag', metavar='FIELD',
+            help='For Undeletable, the boolean field that marked the deleted '
+                 'rows so far; date_deleted is set for the rows where it is '
+                 'true.')
+        parser.add_argument(
+            '--database', default=None,
+            help='The database to backfill (default: the one of the router).')
+
+    def handle(self, *args, **options):
+        try:
+            self.model = apps.get_model(options['model'])
+        except (LookupError, ValueError) as e:
+            raise CommandError(e)
+        self.options = options
+        self.using = options['database'] or router.db_for_write(self.model)
+        self.timestamp = timezone.now()
+        if options['timestamp']:
+            self.timestamp = self.parse_datetime_option('timestamp')
+        self.placeholder = None
+        if options['placeholder']:
+            self.placeholder = self.parse_datetime_option('placeholder')
+
+        mixins = self.get_mixins(options['mixins'])
+        self.state = self.load_state()
+        self.pool = None
+        if options['workers']:
+            if any(conn.in_atomic_block for conn in connections.all()):
+                raise CommandError(
+                    '--workers cannot be used inside a transaction, e.g. '
+                    'from an atomic migration.')
+            # Forked workers would share the sockets of the open connections
+            # (e.g. when called from a migration or a test), so they are
+            # closed and the workers open their own ones when needed.
+            connections.close_all()
+            self.pool = multiprocessing.Pool(
+                options['workers'], initializer=_init_worker)
+        try:
+            for mixin in mixins:
+                count = getattr(self, 'backfill_{}'.format(mixin))()
+                self.stdout.write('{}: {} rows backfilled'.format(
+                    mixin, count))
+        finally:
+            if self.pool is not None:
+                self.pool.close()
+                self.pool.join()
+
+    def parse_datetime_option(self, name):
+        value = parse_datetime(self.options[name])
+        if value is None:
+            raise CommandError('Invalid --{}: {}'.format(
+                name, self.options[name]))
+        return value
+
+    def get_mixins(self, names):
+        available = []
+        if issubclass(self.model, TimeStamped):
+            available.append('timestamped')
+        if hasattr(self.model, 'generate_slug'):
+            available.append('uuslugged')
+        if issubclass(self.model, WithMetadata):
+            available.append('metadata')
+        if issubclass(self.model, Undeletable) and \
+                self.options['deleted_flag']:
+            available.append('undeletable')
+        if not names:
+            return available
+        mixins = [name.strip() for name in names.split(',')]
+        for mixin in mixins:
+            if mixin not in available:
+                raise CommandError(
+                    '{} cannot be backfilled for {} (available: {})'.format(
+                        mixin, self.options['model'],
+                        ', '.join(available) or 'none'))
+        return mixins
+
+    # Checkpoints
+
+    def load_state(self):
+        path = self.options['state_file']
+        if path and os.path.exists(path):
+            with io.open(path, encoding='utf-8') as f:
+                return json.load(f)
+        return {}
+
+    def save_checkpoint(self, mixin, last_pk):
+        path = self.options['state_file']
+        if not path:
+            return
+        self.state.setdefault(self.options['model'], {})[mixin] = last_pk
+        # Replace the file atomically, so that an interruption while writing
+        # does not lose the previous checkpoint
+        tmp_path = '{}.tmp'.format(path)
+        with io.open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(json.dumps(self.state, indent=2))
+        os.rename(tmp_path, path)
+
+    # Batching
+
+    def iter_batches(self, mixin, queryset):
+        """
+        Yield the rows of ``queryset`` in batches, in primary key order,
+        starting after the checkpoint of ``mixin`` and saving the checkpoint
+        after every batch has been processed.
+        """
+        queryset = queryset.using(self.using).order_by('pk')
+        last_pk = self.state.get(self.options['model'], {}).get(mixin)
+        while True:
+            batch = queryset
+            if last_pk is not None:
+                batch = batch.filter(pk__gt=last_pk)
+            batch = list(batch[:self.options['batch_size']])
+            if not batch:
+                break
+            yield batch
+            last_pk = batch[-1].pk
+            self.save_checkpoint(mixin, last_pk)
+            if self.options['sleep']:
+                time.sleep(self.options['sleep'])
+
+    def map(self, func, chunks):
+        """
+        Apply ``func`` to each of ``chunks`` in the pool of workers (or in
+        this process) and return the concatenated results.
+        """
+        if self.pool is None:
+            results = [func(chunk) for chunk in chunks]
+        else:
+            results = self.pool.map(func, chunks)
+        return [item for result in results for item in result]
+
+    def split(self, items):
+        workers = max(self.options['workers'], 1)
+        size = max(len(items) // workers, 1)
+        return [items[i:i + size] for i in range(0, len(items), size)]
+
+    # Mixins
+
+    def backfill_timestamped(self):
+        count = 0
+        manager = self.model._base_manager.db_manager(self.using)
+        for field in ('date_created', 'date_updated'):
+            # The fields are NOT NULL, so the rows to backfill are those that
+            # got the placeholder (or NULL, if they are still nullable)
+            missing = Q(**{'{}__isnull'.format(field): True})
+            if self.placeholder is not None:
+                missing |= Q(**{field: self.placeholder})
+            queryset = manager.filter(missing).only('pk')
+            for batch in self.iter_batches(field, queryset):
+                count += manager.filter(pk__in=[obj.pk for obj in batch]) \
+                    .update(**{field: self.timestamp})
+        return count
+
+    def backfill_undeletable(self):
+        count = 0
+        manager = self.model._base_manager.db_manager(self.using)
+        queryset = manager.filter(**{
+            self.options['deleted_flag']: True, 'date_deleted__isnull': True,
+        }).only('pk')
+        for batch in self.iter_batches('undeletable', queryset):
+            count += manager.filter(pk__in=[obj.pk for obj in batch]) \
+                .update(date_deleted=self.timestamp)
+        return count
+
+    def backfill_uuslugged(self):
+        from groundworks.contrib.uuslug.cache import invalidate_slug_cache
+        from groundworks.contrib.uuslug.utils import allocate_slugs
+
+        count = 0
+        source = self.model._slug_source
+        max_length = self.model._meta.get_field('slug').max_length
+        # The slug may be nullable (and not unique) while it is backfilled
+        queryset = self.model._base_manager \
+            .filter(Q(slug='') | Q(slug__isnull=True)) \
+            .only('pk', 'slug', source)
+        for batch in self.iter_batches('uuslugged', queryset):
+            sources = [getattr(obj, source) for obj in batch]
+            bases = self.map(_make_slug_bases, [
+                (chunk, max_length) for chunk in self.split(sources)])
+            for attempt in range(3):
+                for obj in batch:
+                    obj.slug = ''
+                slugs = allocate_slugs(
+                    batch, bases=bases, using=self.using)
+                for obj, slug in zip(batch, slugs):
+                    obj.slug = slug
+                try:
+                    with transaction.atomic(using=self.using):
+                        self.model._base_manager.db_manager(self.using) \
+                            .bulk_update(batch, ['slug'])
+                except IntegrityError:
+                    # A concurrent insert took one of the slugs
+                    if attempt == 2:
+                        raise
+                else:
+                    break
+            invalidate_slug_cache(
+                self.model, [obj.pk for obj in batch], using=self.using)
+            count += len(batch)
+        return count
+
+    def backfill_metadata(self):
+        count = 0
+        queryset = self.model._base_manager.filter(meta_description='')
+        for batch in self.iter_batches('metadata', queryset):
+            descriptions = self.map(_make_meta_descriptions, self.split(batch))
+            changed = []
+            for obj, description in zip(batch, descriptions):
+                if description != obj.meta_description:
+                    obj.meta_description = description
+                    changed.append(obj)
+            if changed:
+                self.model._base_manager.db_manager(self.using) \
+                    .bulk_update(changed, ['meta_description'])
+            count += len(changed)
+        return count
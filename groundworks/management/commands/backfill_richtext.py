@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import time
+
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+from django.db import router, transaction
+
+
+class Command(BaseCommand):
+    help = ('Fills in the plain text, excerpt and word count of the content '
+            'of RichText models, in batches.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'models', nargs='+', metavar='app_label.ModelName',
+            help='The RichText models to backfill.')
+        parser.add_argument(
+            '--batch-size', type=int, default=500,
+            help='Number of rows to update per query (default: 500).')
+        parser.add_argument(
+            '--only-empty', action='store_true',
+            help='Only backfill rows without plain text content.')
+        parser.add_argument(
+            '--sleep', type=float, default=0,
+            help='Seconds to sleep between batches (default: 0).')
+        parser.add_argument(
+            '--database', default=None,
+            help='The database to backfill (default: the one of the router).')
+
+    def handle(self, *args, **options):
+        for label in options['models']:
+            model = self.get_model(label)
+            count = self.backfill(model, **options)
+            self.stdout.write('{}: {} rows updated'.format(label, count))
+
+    def get_model(self, label):
+        try:
+            model = apps.get_model(label)
+        except (LookupError, ValueError) as e:
+            raise CommandError(e)
+        if not hasattr(model, 'update_content_derivatives'):
+            raise CommandError('{} is not a RichText model'.format(label))
+        return model
+
+    def backfill(self, model, batch_size, only_empty, sleep, database,
+                 **options):
+        database = database or router.db_for_write(model)
+        queryset = model._default_manager.using(database) \
+            .only('pk', 'content').order_by('pk')
+        if only_empty:
+            queryset = queryset.filter(content_text='')
+
+        count = 0
+        last_pk = None
+        while True:
+            batch = queryset
+            if last_pk is not None:
+                batch = batch.filter(pk__gt=last_pk)
+            batch = list(batch[:batch_size])
+            if not batch:
+                break
+            for instance in batch:
+                instance.update_content_derivatives()
+            with transaction.atomic(using=database):
+                model._default_manager.db_manager(database).bulk_update(
+                    batch, model._content_derived_fields)
+            count += len(batch)
+            last_pk = batch[-1].pk
+            if sleep:
+                time.sleep(sleep)
+        return count
@@ -0,0 +1,152 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import csv
+import datetime
+import io
+import os
+
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import router
+from django.utils.dateparse import parse_datetime
+
+from groundworks.managers import make_change_cursor
+
+
+class Command(BaseCommand):
+    help = ('Streams the rows of a TimeStamped model that changed since a '
+            'point in time as JSON Lines or CSV, ordered by date_updated, '
+            'and reports the cursor to resume from.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'model', metavar='app_label.ModelName',
+            help='The TimeStamped model to export.')
+        parser.add_argument(
+            '--since',
+            help='Export the rows updated at or after this ISO 8601 datetime.')
+        parser.add_argument(
+            '--cursor',
+            help='Export the rows after this cursor (as reported by a '
+                 'previous export).')
+        parser.add_argument(
+            '--overlap', type=float, default=0,
+            help='Also export again the rows updated within this many '
+                 'seconds before the cursor, so that rows of transactions '
+                 'that committed late are not skipped. These rows are '
+                 'exported more than once (default: 0).')
+        parser.add_argument(
+            '--state-file',
+            help='Read the cursor from this file, if it exists and no '
+                 '--cursor is given, and write the new cursor to it after a '
+                 'successful export.')
+        parser.add_argument(
+            '--format', choices=['jsonl', 'csv'], default='jsonl',
+            help='The output format (default: jsonl).')
+        parser.add_argument(
+            '--fields',
+            help='Comma separated names of the fields to export (default: '
+                 'all concrete fields).')
+        parser.add_argument(
+            '--chunk-size', type=int, default=2000,
+            help='Number of rows fetched from the database at a time '
+                 '(default: 2000).')
+        parser.add_argument(
+            '--output', help='Write to this file instead of stdout.')
+        parser.add_argument(
+            '--database', default=None,
+            help='The database to export from (default: the one of the '
+                 'router).')
+
+    def handle(self, *args, **options):
+        try:
+            model = apps.get_model(options['model'])
+        except (LookupError, ValueError) as e:
+            raise CommandError(e)
+        if not hasattr(model._default_manager.all(), 'changed_since'):
+            raise CommandError(
+                '{} does not have a TimeStamped manager'.format(
+                    options['model']))
+
+        since = None
+        if options['since']:
+            since = parse_datetime(options['since'])
+            if since is None:
+                raise CommandError('Invalid --since: {}'.format(
+                    options['since']))
+        cursor = options['cursor'] or self.read_state(options['state_file'])
+
+        fields = self.get_fields(model, options['fields'])
+        overlap = datetime.timedelta(seconds=options['overlap'])
+        database = options['database'] or router.db_for_read(model)
+        try:
+            queryset = model._default_manager.using(database) \
+                .all().changed_since(since, cursor, overlap).values(*fields)
+        except ValueError as e:
+            raise CommandError(e)
+
+        if options['output']:
+            stream = io.open(options['output'], 'w', encoding='utf-8',
+                             newline='')
+        else:
+            stream = self.stdout
+        try:
+            count, last = self.export(
+                queryset.iterator(chunk_size=options['chunk_size']),
+                fields, options['format'], stream, model._meta.pk.attname)
+        finally:
+            if options['output']:
+                stream.close()
+
+        if last is not None:
+            cursor = make_change_cursor(*last)
+            self.write_state(options['state_file'], cursor)
+        self.stderr.write('{} rows exported, cursor: {}'.format(
+            count, cursor or ''))
+
+    def get_fields(self, model, fields):
+        names = [field.attname for field in model._meta.concrete_fields]
+        if fields:
+            names = [name.strip() for name in fields.split(',')]
+        # The cursor needs these, even if they are not asked for
+        for name in ('date_updated', model._meta.pk.attname):
+            if name not in names:
+                names.append(name)
+        return names
+
+    def export(self, rows, fields, format, stream, pk_name):
+        count = 0
+        last = None
+        if format == 'csv':
+            writer = csv.DictWriter(stream, fieldnames=fields)
+            writer.writeheader()
+            write = writer.writerow
+        else:
+            encoder = DjangoJSONEncoder()
+
+            def write(row):
+                stream.write(encoder.encode(row) + '\n')
+
+        for row in rows:
+            write(row)
+            count += 1
+            last = (row['date_updated'], row[pk_name])
+        return count, last
+
+    def read_state(self, path):
+        if path and os.path.exists(path):
+            with io.open(path, encoding='utf-8') as f:
+                return f.read().strip() or None
+        return None
+
+    def write_state(self, path, cursor):
+        if not path:
+            return
+        # Replace the file atomically, so that an interrupted write does not
+        # lose the previous cursor
+        tmp_path = '{}.tmp'.format(path)
+        with io.open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(cursor)
+        os.rename(tmp_path, path)
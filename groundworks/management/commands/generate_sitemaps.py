@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import os
+
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+
+from groundworks.sitemaps import ShardedSitemap, write_sitemap_index
+
+
+class Command(BaseCommand):
+    help = ('Writes sharded sitemaps for the given models, along with a '
+            'sitemap index, regenerating only the shards that changed.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'models', nargs='+', metavar='app_label.ModelName',
+            help='The models to include in the sitemaps.')
+        parser.add_argument(
+            '--base-url', required=True,
+            help='The URL that the paths of the instances are relative to, '
+                 'e.g. https://example.com')
+        parser.add_argument(
+            '--output-dir', required=True,
+            help='The directory to write the sitemaps to.')
+        parser.add_argument(
+            '--files-url',
+            help='The URL that the output directory is served under '
+                 '(default: the base URL).')
+        parser.add_argument(
+            '--index', default='sitemap.xml',
+            help='The filename of the sitemap index (default: sitemap.xml).')
+        parser.add_argument(
+            '--shard-size', type=int, default=None,
+            help='Maximum number of instances per shard (default: as many as '
+                 'fit in 50,000 URLs).')
+        parser.add_argument(
+            '--full', action='store_true',
+            help='Write all shards, even those that have not changed.')
+
+    def handle(self, *args, **options):
+        output_dir = options['output_dir']
+        if not os.path.isdir(output_dir):
+            os.makedirs(output_dir)
+
+        entries = []
+        for label in options['models']:
+            try:
+                model = apps.get_model(label)
+            except (LookupError, ValueError) as e:
+                raise CommandError(e)
+            sitemap = ShardedSitemap(
+                model, options['base_url'], shard_size=options['shard_size'])
+            model_entries = sitemap.generate(output_dir, full=options['full'])
+            self.stdout.write(
+                '{}: {} shards'.format(label, len(model_entries)))
+            entries.extend(model_entries)
+
+        write_sitemap_index(
+            entries, os.path.join(output_dir, options['index']),
+            options['files_url'] or options['base_url'])
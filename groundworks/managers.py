@@ -1,18 +1,181 @@
 # -*- coding: utf-8 -*-
 from __future__ import unicode_literals
 
+import hashlib
 import random
 
-from django.db import models
+from django.core.cache import caches
+from django.core.exceptions import EmptyResultSet
+from django.db import DEFAULT_DB_ALIAS, connections, models
+from django.db.models.query import BaseIterable, ValuesListIterable
+from django.db.models.functions import TruncDay, TruncMonth, TruncYear
 from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from django.utils.encoding import force_bytes, force_text
 
+from groundworks.routers import read_from_replica
 
-class ActivatableQuerySet(models.QuerySet):
+
+def run_in_thread(func, *args, **kwargs):
+    """
+    Return an awaitable that runs ``func`` in the thread that asgiref keeps
+    for sync code, i.e. with a single thread hop, since the ORM cannot be
+    used from the event loop.
+
+    NOTE: This depends on the ``asgiref`` python library (the ``async``
+          extra of the package)
+    """
+    from asgiref.sync import sync_to_async
+    return sync_to_async(func, thread_sensitive=True)(*args, **kwargs)
+
+
+def make_change_cursor(date_updated, pk):
+    """
+    Return the cursor of ``TimeStampedQuerySet.changed_since`` for the
+    instance with ``date_updated`` and ``pk``, as a string.
+    """
+    return '{}|{}'.format(date_updated.isoformat(), pk)
+
+
+def parse_change_cursor(cursor):
+    """
+    Return the ``(date_updated, pk)`` of a cursor made by
+    ``make_change_cursor``. The primary key is returned as a string.
+    """
+    try:
+        date_updated, pk = cursor.split('|', 1)
+    except (AttributeError, ValueError):
+        raise ValueError('Invalid cursor: {!r}'.format(cursor))
+    value = parse_datetime(date_updated)
+    if value is None:
+        raise ValueError('Invalid cursor: {!r}'.format(cursor))
+    return value, pk
+
+
+# The methods of the models that the rows of ``project`` provide, if the
+# model has them and the fields that they need have been projected.
+PROJECTION_METHODS = (
+    'get_absolute_url', 'get_absolute_url_for_lang', 'get_admin_url',
+    'is_draft',
+)
+
+_projection_classes = {}
+
+
+def _projection_setattr(self, name, value):
+    raise AttributeError(
+        "'{}' rows are read-only".format(self.__class__.__name__))
+
+
+def _projection_repr(self):
+    return '<{}: {}>'.format(self.__class__.__name__, ', '.join(
+        '{}={!r}'.format(name, getattr(self, name))
+        for name in self.__slots__))
+
+
+def get_projection_class(model, fields):
+    """
+    Return a class for read-only rows of ``model`` with only ``fields`` (as
+    ``__slots__``), the ``pk`` and ``_meta`` of the model and the
+    ``PROJECTION_METHODS`` that it has.
+    """
+    key = (model, tuple(fields))
+    try:
+        return _projection_classes[key]
+    except KeyError:
+        pass
+
+    pk_name = model._meta.pk.attname
+    attrs = {
+        '__slots__': tuple(fields),
+        '__setattr__': _projection_setattr,
+        '__repr__': _projection_repr,
+        '_meta': model._meta,
+        'pk': property(lambda self: getattr(self, pk_name)),
+    }
+    for name in PROJECTION_METHODS:
+        method = getattr(model, name, None)
+        if method is not None:
+            attrs[name] = getattr(method, '__func__', method)
+
+    def __init__(self, *values):
+        for name, value in zip(self.__slots__, values):
+            object.__setattr__(self, name, value)
+    attrs['__init__'] = __init__
+
+    cls = type(str('{}Row'.format(model.__name__)), (object,), attrs)
+    _projection_classes[key] = cls
+    return cls
+
+
+class ProjectionIterable(BaseIterable):
+    """
+    Yields the rows of a ``values_list`` query as instances of the class of
+    ``get_projection_class``.
+    """
+
+    def __iter__(self):
+        queryset = self.queryset
+        row_class = get_projection_class(queryset.model, queryset._fields)
+        rows = ValuesListIterable(
+            queryset, chunked_fetch=self.chunked_fetch,
+            chunk_size=self.chunk_size)
+        for row in rows:
+            yield row_class(*row)
+
+
+class ProjectableQuerySet(models.QuerySet):
+    """
+    A ``QuerySet`` base for the groundworks querysets, that adds ``project``.
+    """
+
+    def project(self, *fields):
+        """
+        Return the instances as compact, read-only rows with only ``fields``
+        (and the primary key), instead of model instances. The rows support
+        the helpers of the groundworks mixins, like ``is_draft``,
+        ``get_absolute_url_for_lang`` and ``get_admin_url``, as long as the
+        fields that these need are among ``fields``.
+
+        Example:
+            for row in Article.objects.published().project(
+                    'title', 'is_published', 'date_published'):
+                row.title, row.is_draft()
+        """
+        pk_name = self.model._meta.pk.attname
+        # ``pk`` is provided by the rows as a property of the primary key
+        fields = tuple(pk_name if name == 'pk' else name for name in fields)
+        if pk_name not in fields:
+            fields = (pk_name,) + fields
+        clone = self.values_list(*fields)
+        clone._iterable_class = ProjectionIterable
+        return clone
+
+    async def alist(self):
+        """
+        Return the results of the queryset as a list, fetched in a single
+        hop to the sync thread, without blocking the event loop. This works
+        on any queryset, including sliced or projected ones.
+
+        Example:
+            entries = await Article.objects.published()[:20].alist()
+        """
+        return await run_in_thread(list, self)
+
+
+class ActivatableQuerySet(ProjectableQuerySet):
     """
     A ``QuerySet`` for ``Activatable`` models
     """
     def active(self):
-        return self.filter(is_active=True)
+        return read_from_replica(self.filter(is_active=True))
+
+    async def aactive(self):
+        """
+        Return the active instances as a list, fetched without blocking the
+        event loop.
+        """
+        return await self.active().alist()
 
 
 class ActivatableManager(models.Manager):
@@ -25,14 +188,57 @@ class ActivatableManager(models.Manager):
     def active(self):
         return self.get_queryset().active()
 
+    async def aactive(self):
+        return await self.get_queryset().aactive()
+
 
-class TimeStampedQuerySet(models.QuerySet):
+class TimeStampedQuerySet(ProjectableQuerySet):
     """
     A ``QuerySet`` for ``TimeStamped`` models.
     """
 
     def newest(self):
-        return self.order_by('-date_created')
+        return read_from_replica(self.order_by('-date_created'))
+
+    async def anewest(self, limit=None):
+        """
+        Return the newest instances (at most ``limit``) as a list, fetched
+        without blocking the event loop.
+        """
+        return await self.newest()[:limit].alist()
+
+    def changed_since(self, since=None, cursor=None, overlap=None):
+        """
+        Return the instances updated since the datetime ``since`` (inclusive)
+        ordered by ``(date_updated, pk)``, so that they can be consumed in
+        batches or streamed.
+
+        Pass the ``cursor`` of the last instance consumed (see
+        ``make_change_cursor``) to get only the instances after it.
+
+        NOTE: ``date_updated`` is set before the transaction of a save
+              commits, so an instance may become visible after instances
+              with a later ``date_updated`` have been consumed, in which case
+              it is skipped by the cursor. Pass an ``overlap`` (a
+              ``timedelta`` longer than the longest transaction) to get the
+              instances updated within it before the cursor again. These are
+              then returned more than once, so consumers have to deduplicate
+              them, e.g. by their primary key and ``date_updated``.
+        """
+        queryset = self.order_by('date_updated', 'pk')
+        if since is not None:
+            queryset = queryset.filter(date_updated__gte=since)
+        if cursor is not None:
+            date_updated, pk = parse_change_cursor(cursor)
+            if overlap:
+                queryset = queryset.filter(
+                    date_updated__gte=date_updated - overlap)
+            else:
+                queryset = queryset.filter(
+                    models.Q(date_updated__gt=date_updated) |
+                    models.Q(date_updated=date_updated, pk__gt=pk)
+                )
+        return queryset
 
 
 class TimeStampedManager(models.Manager):
@@ -46,30 +252,133 @@ class TimeStampedManager(models.Manager):
     def newest(self):
         return self.get_queryset().newest()
 
+    async def anewest(self, limit=None):
+        return await self.get_queryset().anewest(limit)
+
+    def changed_since(self, since=None, cursor=None, overlap=None):
+        return self.get_queryset().changed_since(since, cursor, overlap)
 
-class PublishableQuerySet(models.QuerySet):
+
+class PublishableQuerySet(ProjectableQuerySet):
     """
     A ``QuerySet`` for ``Publishable`` models.
     """
+    # The current times that ``draft`` and ``published`` filtered by
+    _time_bounds = ()
+
+    def _clone(self):
+        clone = super(PublishableQuerySet, self)._clone()
+        clone._time_bounds = self._time_bounds
+        return clone
+
+    def _bound_by(self, queryset, now):
+        queryset._time_bounds = self._time_bounds + (now,)
+        return queryset
 
     def draft(self):
         now = timezone.now()
-        return self.filter(
+        return self._bound_by(self.filter(
             models.Q(is_published=False) | models.Q(date_published__gt=now)
-        )
+        ), now)
 
     def published(self):
         now = timezone.now()
-        return self.filter(is_published=True, date_published__lte=now)
+        return read_from_replica(self._bound_by(
+            self.filter(is_published=True, date_published__lte=now), now))
+
+    async def adraft(self):
+        """
+        Return the draft instances as a list, fetched without blocking the
+        event loop.
+        """
+        return await self.draft().alist()
+
+    async def apublished(self):
+        """
+        Return the published instances as a list, fetched without blocking
+        the event loop.
+        """
+        return await self.published().alist()
 
     def published_before(self, date):
-        return self.filter(publish_date__lt=date)
+        return self.filter(date_published__lt=date)
 
     def published_after(self, date):
-        return self.filter(publish_date__gt=date)
+        return self.filter(date_published__gt=date)
 
     def published_between(self, start, end):
-        return self.filter(publish_date__range=(start, end))
+        return self.filter(date_published__range=(start, end))
+
+    _archive_truncs = {
+        'year': TruncYear,
+        'month': TruncMonth,
+        'day': TruncDay,
+    }
+
+    def archive(self, kind='month'):
+        """
+        Return the number of published instances per year, month or day
+        (according to ``kind``), computed in a single ``GROUP BY`` query, as
+        dictionaries with an ``archive_date`` and a ``count``, newest first.
+        """
+        try:
+            trunc = self._archive_truncs[kind]
+        except KeyError:
+            raise ValueError(
+                "kind must be one of 'year', 'month' or 'day', not "
+                "'{}'".format(kind))
+        return self.published() \
+            .annotate(archive_date=trunc('date_published')) \
+            .values('archive_date') \
+            .annotate(count=models.Count('pk')) \
+            .order_by('-archive_date')
+
+    def cached_archive(self, kind='month', timeout=3600,
+                       cache_alias='default'):
+        """
+        Return ``archive`` as a list, cached for ``timeout`` seconds or until
+        the next scheduled publication, whichever comes first, so that
+        scheduled instances show up in the archive once they are published.
+
+        The cache key is made from the query of this queryset, so this can be
+        cached as long as the query is the same across calls. The current
+        time that ``published`` and ``draft`` filter by is left out of the
+        key, but other filters by values that change on every call (e.g.
+        ``published_before(timezone.now())``) make a new key every time.
+        """
+        try:
+            query = '{}'.format(self.query)
+        except EmptyResultSet:
+            # E.g. ``none()`` or an empty ``__in``, which match nothing
+            return []
+        ops = connections[DEFAULT_DB_ALIAS].ops
+        for now in self._time_bounds:
+            # As rendered in the query, see ``Query.__str__``
+            query = query.replace(
+                force_text(ops.adapt_datetimefield_value(now)), '<now>')
+        cache = caches[cache_alias]
+        key = 'groundworks.archive:{}:{}'.format(
+            self.model._meta.label_lower,
+            hashlib.md5(force_bytes('{}|{}|{}'.format(
+                kind, timezone.get_current_timezone_name(), query,
+            ))).hexdigest(),
+        )
+        archive = cache.get(key)
+        if archive is None:
+            archive = list(self.archive(kind))
+            now = timezone.now()
+            # Filtered by ``published``, this cannot have scheduled instances,
+            # so those of the whole table are taken into account instead
+            scheduled = self.model._base_manager.db_manager(self._db) \
+                if self._time_bounds else self
+            next_publication = scheduled.filter(
+                is_published=True, date_published__gt=now,
+            ).aggregate(next=models.Min('date_published'))['next']
+            if next_publication is not None:
+                until_next = (next_publication - now).total_seconds()
+                timeout = min(timeout, max(int(until_next), 1))
+            cache.set(key, archive, timeout)
+        return archive
 
 
 class PublishableManager(models.Manager):
@@ -86,6 +395,12 @@ class PublishableManager(models.Manager):
     def published(self):
         return self.get_queryset().published()
 
+    async def adraft(self):
+        return await self.get_queryset().adraft()
+
+    async def apublished(self):
+        return await self.get_queryset().apublished()
+
     def published_before(self, date):
         return self.get_queryset().published_before(date)
 
@@ -95,7 +410,15 @@ class PublishableManager(models.Manager):
     def published_between(self, start, end):
         return self.get_queryset().published_between(start, end)
 
-class UndeletableQuerySet(models.QuerySet):
+    def archive(self, kind='month'):
+        return self.get_queryset().archive(kind)
+
+    def cached_archive(self, kind='month', timeout=3600,
+                       cache_alias='default'):
+        return self.get_queryset().cached_archive(kind, timeout, cache_alias)
+
+
+class UndeletableQuerySet(ProjectableQuerySet):
     """
     A ``QuerySet`` for ``Undeletable`` models.
     """
@@ -103,8 +426,39 @@ class UndeletableQuerySet(models.QuerySet):
     def deleted(self):
         return self.exclude(date_deleted__isnull=True)
 
+    def deleted_with_archived(self):
+        """
+        Return the deleted instances, including those moved to the archive
+        model of the model, if it has one (see ``groundworks.archiving``).
+
+        The result is a union of the two tables and is read-only: it cannot
+        be filtered any further (filters applied before it affect only the
+        rows of the live table), and saving an archived instance would insert
+        it into the live table again. Use ``restore_archived`` instead.
+        """
+        deleted = self.deleted()
+        archive_model = getattr(self.model, '_archive_model', None)
+        if archive_model is None:
+            return deleted
+        archived = archive_model._base_manager.using(self.db).order_by()
+        return deleted.order_by().union(archived, all=True)
+
     def not_deleted(self):
-        return self.filter(date_deleted__isnull=True)
+        return read_from_replica(self.filter(date_deleted__isnull=True))
+
+    async def adeleted(self):
+        """
+        Return the deleted instances as a list, fetched without blocking the
+        event loop.
+        """
+        return await self.deleted().alist()
+
+    async def anot_deleted(self):
+        """
+        Return the instances that are not deleted as a list, fetched without
+        blocking the event loop.
+        """
+        return await self.not_deleted().alist()
 
 
 class UndeletableManager(models.Manager):
@@ -122,9 +476,18 @@ class UndeletableManager(models.Manager):
     def deleted(self):
         return self.get_queryset().deleted()
 
+    def deleted_with_archived(self):
+        return self.get_queryset().deleted_with_archived()
+
     def not_deleted(self):
         return self.get_queryset().not_deleted()
 
+    async def adeleted(self):
+        return await self.get_queryset().adeleted()
+
+    async def anot_deleted(self):
+        return await self.get_queryset().anot_deleted()
+
 
 class RandomizingManager(models.Manager):
     def _get_pool_for_random(self):
@@ -142,7 +505,7 @@ class RandomizingManager(models.Manager):
         enough instances in the sample pool.
         """
         choices = []
-        pool = set(self._get_pool_for_random())
+        pool = list(set(read_from_replica(self._get_pool_for_random())))
         while count:
             try:
                 choices = random.sample(pool, count)
@@ -151,3 +514,9 @@ class RandomizingManager(models.Manager):
             else:
                 break
         return choices
+
+    async def aget_random(self, count):
+        """
+        Like ``get_random``, without blocking the event loop.
+        """
+        return await run_in_thread(self.get_random, count)
@@ -1,8 +1,11 @@
 from django.conf import settings
 from django.core.mail import mail_admins
 from django.middleware.common import BrokenLinkEmailsMiddleware
+from django.utils.deprecation import MiddlewareMixin
 from django.utils.encoding import force_text
 
+from groundworks import instrumentation, routers
+
 
 class BrokenLinkEmailsToAdminsMiddleware(BrokenLinkEmailsMiddleware):
     """
@@ -32,3 +35,46 @@ class BrokenLinkEmailsToAdminsMiddleware(BrokenLinkEmailsMiddleware):
                     "IP address: %s\n" % (referer, path, ua, ip),
                     fail_silently=True)
         return response
+
+
+class InstrumentationMiddleware(MiddlewareMixin):
+    """
+    Attaches the per request breakdown of the instrumented groundworks calls
+    (see ``groundworks.instrumentation``) to the response, in the
+    ``Server-Timing`` header, so that it shows up in the developer tools of
+    browsers. E.g. the value of the header for a single save is::
+
+        TimeStamped.save;dur=3.12;desc="1 calls, 1 queries, 2.05ms SQL"
+
+    This is meant for debugging and does nothing unless the instrumentation
+    is enabled.
+    """
+
+    def process_request(self, request):
+        if instrumentation.is_enabled():
+            instrumentation.start_breakdown()
+
+    def process_response(self, request, response):
+        breakdown = instrumentation.stop_breakdown()
+        if breakdown:
+            response['Server-Timing'] = ', '.join(
+                '{};dur={:.2f};desc="{} calls, {} queries, {:.2f}ms SQL"'
+                .format(name, entry['wall_time'] * 1000, entry['calls'],
+                        entry['queries'], entry['sql_time'] * 1000)
+                for name, entry in sorted(breakdown.items())
+            )
+        return response
+
+
+class ReplicaPinningMiddleware(MiddlewareMixin):
+    """
+    Limits the pinning of reads to the primary database after a write (see
+    ``groundworks.routers``) to the request of the write.
+    """
+
+    def process_request(self, request):
+        routers.unpin()
+
+    def process_response(self, request, response):
+        routers.unpin()
+        return response
@@ -24,7 +24,7 @@ class Activatable(models.Model):
 class TimeStamped(models.Model):
     date_created = models.DateTimeField(_('date created'))
     date_updated = models.DateTimeField(
-        _('date updated'), default=timezone.now)
+        _('date updated'), default=timezone.now, db_index=True)
 
     objects = gw_managers.TimeStampedManager()
 
@@ -33,14 +33,27 @@ class TimeStamped(models.Model):
         base_manager_name = 'objects'
 
     def save(self, *args, **kwargs):
-        if not self.date_created:
-            self.date_created = timezone.now()
+        self.update_timestamps()
+        # Partial saves have to bump date_updated as well, since the
+        # versioned caches and the change feeds depend on it.
+        update_fields = kwargs.get('update_fields')
+        if update_fields:
+            kwargs['update_fields'] = set(update_fields) | {'date_updated'}
         return super(TimeStamped, self).save(*args, **kwargs)
 
+    def update_timestamps(self):
+        """
+        Set the timestamps that need to be set before saving this instance.
+        """
+        now = timezone.now()
+        if not self.date_created:
+            self.date_created = now
+        self.date_updated = now
+
 
 class Publishable(models.Model):
     date_published = models.DateTimeField(
-        _('published on'), blank=True, null=True, help_text=_(
+        _('published on'), blank=True, null=True, db_index=True, help_text=_(
             'This will not be shown until the date and time given here.'))
     is_published = models.BooleanField(
         _('Published'), default=False, help_text=_(
@@ -88,7 +101,7 @@ class Undeletable(models.Model):
 
     NOTE: The instances can be normally deleted via Managers.
     """
-    date_deleted = models.DateTimeField(blank=True)
+    date_deleted = models.DateTimeField(blank=True, null=True)
 
     objects = gw_managers.UndeletableManager()
 
@@ -98,7 +111,13 @@ class Undeletable(models.Model):
 
     def delete(self, *args, **kwargs):
         self.date_deleted = timezone.now()
-        return
+        self.save(update_fields=['date_deleted'], using=kwargs.get('using'))
+
+    async def adelete(self, *args, **kwargs):
+        """
+        Like ``delete``, without blocking the event loop.
+        """
+        await gw_managers.run_in_thread(self.delete, *args, **kwargs)
 
 
 # TODO: Add check for the case of unique=True for a field in
@@ -126,13 +145,18 @@ class WithEnforcedValues(models.Model):
         abstract = True
 
     def save(self, *args, **kwargs):
-        if self._enforced_values:
-            for field, value in six.iteritems(self._enforced_values):
-                if callable(value):
-                    setattr(self, field, value(self))
-                setattr(self, field, value)
+        self.enforce_values()
         return super(WithEnforcedValues, self).save(*args, **kwargs)
 
+    def enforce_values(self):
+        """
+        Set the values of ``_enforced_values`` on this instance.
+        """
+        for field, value in six.iteritems(self._enforced_values):
+            if callable(value):
+                value = value(self)
+            setattr(self, field, value)
+
 
 class RegisteredInAdmin(models.Model):
     """
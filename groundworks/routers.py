@@ -0,0 +1,193 @@
+# -*- coding: utf-8 -*-
+"""
+Routing of the read helpers of the groundworks querysets (``active``,
+``newest``, ``published``, ``not_deleted`` and ``get_random``) to read
+replicas.
+
+Add ``ReplicaRouter`` to ``DATABASE_ROUTERS`` and list the aliases of the
+replicas in the settings::
+
+    DATABASE_ROUTERS = ['groundworks.routers.ReplicaRouter']
+    GROUNDWORKS_REPLICAS = ['replica1', 'replica2']
+
+The rest of the settings are optional:
+
+``GROUNDWORKS_PRIMARY_DATABASE``
+    The alias of the primary database. Defaults to ``'default'``.
+``GROUNDWORKS_REPLICA_SELECTION``
+    ``'round_robin'`` (the default) or ``'least_lag'``.
+``GROUNDWORKS_REPLICA_PIN_SECONDS``
+    For how long reads stick to the primary after a write, in seconds, so
+    that they see that write. Defaults to ``5``. Add
+    ``groundworks.middleware.ReplicaPinningMiddleware`` to limit this to the
+    request of the write.
+``GROUNDWORKS_REPLICA_MAX_LAG``
+    With ``'least_lag'``, the replicas lagging more than this many seconds
+    are not used at all. Defaults to ``None`` (no limit).
+``GROUNDWORKS_REPLICA_LAG_CHECK_INTERVAL``
+    How often the lag of each replica is checked, in seconds. Defaults to
+    ``5``.
+``GROUNDWORKS_REPLICA_LAG_FUNCTION``
+    The dotted path of a callable that takes the alias of a replica and
+    returns its lag in seconds. Defaults to ``postgresql_replica_lag``.
+
+The read helpers do not bind their querysets to a replica; they only mark
+them, and the replica is chosen by ``ReplicaRouter`` when they are read.
+Writes, including those made from these querysets (``update``, ``delete``,
+``select_for_update``, ``get_or_create`` etc), those of the ``save``
+overrides of the mixins and of soft deletion, always go to the primary
+database.
+"""
+from __future__ import unicode_literals
+
+import itertools
+import threading
+from timeit import default_timer as timer
+
+from django.conf import settings
+from django.db import connections
+from django.utils.module_loading import import_string
+
+# The hint that marks the querysets whose reads may go to a replica
+REPLICA_HINT = 'groundworks_read_from_replica'
+
+_local = threading.local()
+_lock = threading.Lock()
+_round_robin = {}
+_lags = {}
+
+
+def get_primary_database():
+    return getattr(settings, 'GROUNDWORKS_PRIMARY_DATABASE', 'default')
+
+
+def get_replicas():
+    return list(getattr(settings, 'GROUNDWORKS_REPLICAS', []))
+
+
+def pin_to_primary(seconds=None):
+    """
+    Make the reads of this thread go to the primary database for ``seconds``
+    (by default ``GROUNDWORKS_REPLICA_PIN_SECONDS``).
+    """
+    if seconds is None:
+        seconds = getattr(settings, 'GROUNDWORKS_REPLICA_PIN_SECONDS', 5)
+    _local.pinned_until = timer() + seconds
+
+
+def unpin():
+    _local.pinned_until = None
+
+
+def is_pinned_to_primary():
+    pinned_until = getattr(_local, 'pinned_until', None)
+    if pinned_until is not None and pinned_until > timer():
+        return True
+    # Reads from a replica inside a transaction would not see its writes
+    return connections[get_primary_database()].in_atomic_block
+
+
+def postgresql_replica_lag(alias):
+    """
+    Return the replication lag of the PostgreSQL replica ``alias`` in seconds.
+    """
+    with connections[alias].cursor() as cursor:
+        cursor.execute(
+            'SELECT COALESCE(EXTRACT(EPOCH FROM '
+            'now() - pg_last_xact_replay_timestamp()), 0)')
+        return float(cursor.fetchone()[0])
+
+
+def get_replica_lag(alias):
+    """
+    Return the (cached) lag of the replica ``alias`` in seconds, or ``None``
+    if it could not be determined.
+    """
+    interval = getattr(settings, 'GROUNDWORKS_REPLICA_LAG_CHECK_INTERVAL', 5)
+    checked, lag = _lags.get(alias, (None, None))
+    now = timer()
+    if checked is None or now - checked > interval:
+        lag_function = import_string(getattr(
+            settings, 'GROUNDWORKS_REPLICA_LAG_FUNCTION',
+            'groundworks.routers.postgresql_replica_lag'))
+        try:
+            lag = lag_function(alias)
+        except Exception:
+            lag = None
+        _lags[alias] = (now, lag)
+    return lag
+
+
+def _select_round_robin(replicas):
+    key = tuple(replicas)
+    with _lock:
+        if key not in _round_robin:
+            _round_robin[key] = itertools.cycle(replicas)
+        return next(_round_robin[key])
+
+
+def _select_least_lag(replicas):
+    max_lag = getattr(settings, 'GROUNDWORKS_REPLICA_MAX_LAG', None)
+    lags = []
+    for alias in replicas:
+        lag = get_replica_lag(alias)
+        if lag is not None and (max_lag is None or lag <= max_lag):
+            lags.append((lag, alias))
+    return min(lags)[1] if lags else None
+
+
+def get_read_database(model=None):
+    """
+    Return the alias of the database that the read helpers should use, or
+    ``None`` for the primary database.
+    """
+    replicas = get_replicas()
+    if not replicas or is_pinned_to_primary():
+        return None
+    selection = getattr(
+        settings, 'GROUNDWORKS_REPLICA_SELECTION', 'round_robin')
+    if selection == 'least_lag':
+        return _select_least_lag(replicas)
+    return _select_round_robin(replicas)
+
+
+def read_from_replica(queryset):
+    """
+    Return ``queryset`` marked so that ``ReplicaRouter`` sends its reads to a
+    replica, unless a database is explicitly chosen for it with ``using`` or
+    reads should go to the primary database when it is evaluated.
+    """
+    # A new dict, since the hints are shared with the clones of the queryset
+    queryset._hints = dict(queryset._hints, **{REPLICA_HINT: True})
+    return queryset
+
+
+class ReplicaRouter(object):
+    """
+    Sends all writes to the primary database and pins the reads of the
+    thread to it for a while after each write.
+
+    Reads are not routed by this, apart from those of the querysets marked
+    by ``read_from_replica``, e.g. those of the read helpers of the
+    groundworks querysets.
+    """
+
+    def db_for_read(self, model, **hints):
+        if hints.get(REPLICA_HINT):
+            return get_read_database(model)
+        return None
+
+    def db_for_write(self, model, **hints):
+        pin_to_primary()
+        return get_primary_database()
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = set(get_replicas()) | {get_primary_database()}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db in get_replicas():
+            return False
+        return None
@@ -0,0 +1,328 @@
+# -*- coding: utf-8 -*-
+"""
+Generation of sharded sitemap files, with a sitemap index, for models with a
+lot of URLs.
+
+The instances (by default the ``published`` ones of ``Publishable`` models)
+are walked in primary key order and split into shards that stay within the
+limit of 50,000 URLs per sitemap, counting one URL per language for
+``WithMultilingualURL`` models, which also get ``hreflang`` alternates. A
+manifest keeps the id, the primary key range and a fingerprint of the
+contents of every shard. The ranges and their ids (which name the files) are
+kept across runs, so that adding or removing an instance changes only the
+shard that it belongs to, and only the shards whose contents changed are
+written again.
+
+Example:
+    sitemap = ShardedSitemap(Article, 'https://example.com')
+    entries = sitemap.generate('/srv/static/sitemaps')
+    write_sitemap_index(entries, '/srv/static/sitemaps/sitemap.xml',
+                        'https://example.com/static/sitemaps/')
+
+See also the ``generate_sitemaps`` management command.
+"""
+from __future__ import unicode_literals
+
+import hashlib
+import io
+import json
+import os
+from xml.sax.saxutils import escape, quoteattr
+
+from django.conf import settings
+from django.utils import six, translation
+from django.utils.encoding import force_bytes, force_text
+
+SITEMAP_URL_LIMIT = 50000
+
+_URLSET_START = (
+    '<?xml version="1.0" encoding="UTF-8"?>\n'
+    '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9" '
+    'xmlns:xhtml="http://www.w3.org/1999/xhtml">\n'
+)
+_URLSET_END = '</urlset>\n'
+
+
+def _write_atomically(path, chunks):
+    tmp_path = '{}.tmp'.format(path)
+    with io.open(tmp_path, 'w', encoding='utf-8') as f:
+        for chunk in chunks:
+            f.write(chunk)
+    os.rename(tmp_path, path)
+
+
+def _format_lastmod(value):
+    return value.isoformat() if value is not None else None
+
+
+def _overrides_url_for_lang(model):
+    """
+    Check whether ``model`` has its own ``get_absolute_url_for_lang``, instead
+    of the one of ``WithMultilingualURL``, which only activates the language.
+    """
+    from groundworks.models import WithMultilingualURL
+    return six.get_unbound_function(model.get_absolute_url_for_lang) is not \
+        six.get_unbound_function(WithMultilingualURL.get_absolute_url_for_lang)
+
+
+class ShardedSitemap(object):
+    """
+    The sharded sitemap of the instances of ``model``.
+
+    ``base_url`` is prepended to the (absolute) paths of the instances.
+    ``queryset`` defaults to the ``published`` instances if the default
+    manager has such a method, otherwise to all of them. ``languages``
+    defaults to ``settings.LANGUAGES`` for ``WithMultilingualURL`` models.
+    """
+
+    def __init__(self, model, base_url, name=None, queryset=None,
+                 languages=None, shard_size=None, chunk_size=2000):
+        self.model = model
+        self.base_url = base_url.rstrip('/')
+        self.name = name or model._meta.label_lower.replace('.', '-')
+        self.queryset = queryset
+        self.multilingual = hasattr(model, 'get_absolute_url_for_lang')
+        self.custom_urls_for_lang = \
+            self.multilingual and _overrides_url_for_lang(model)
+        if languages is None:
+            languages = [code for code, __ in settings.LANGUAGES] \
+                if self.multilingual else []
+        self.languages = list(languages)
+        urls_per_instance = max(len(self.languages), 1)
+        self.shard_size = min(
+            shard_size or SITEMAP_URL_LIMIT,
+            SITEMAP_URL_LIMIT // urls_per_instance)
+        self.chunk_size = chunk_size
+        self.has_lastmod = any(
+            field.name == 'date_updated'
+            for field in model._meta.concrete_fields)
+
+    def get_queryset(self):
+        if self.queryset is not None:
+            return self.queryset.all()
+        manager = self.model._default_manager
+        if hasattr(manager, 'published'):
+            return manager.published()
+        return manager.all()
+
+    def get_shard_filename(self, shard_id):
+        return 'sitemap-{}-{}.xml'.format(self.name, shard_id)
+
+    def get_manifest_filename(self):
+        return 'sitemap-{}.json'.format(self.name)
+
+    def iter_shards(self, bounds=()):
+        """
+        Walk the primary keys (and ``date_updated``) of the instances in
+        order and yield a dictionary for every shard, with its first and last
+        primary key, its size, its ``lastmod``, a digest of its contents and
+        the index of the range of ``bounds`` that it belongs to.
+
+        A shard ends at each of the primary keys in ``bounds`` (the last ones
+        of the shards of a previous run) and whenever it reaches
+        ``shard_size`` instances. Shards without instances are skipped.
+        """
+        to_python = self.model._meta.pk.to_python
+        bounds = [to_python(bound) for bound in bounds]
+        fields = ['pk', 'date_updated'] if self.has_lastmod else ['pk']
+        rows = self.get_queryset().order_by('pk').values_list(*fields) \
+            .iterator(chunk_size=self.chunk_size)
+
+        shard = None
+        bound = 0
+        for row in rows:
+            # End the shards whose range is over
+            while bound < len(bounds) and row[0] > bounds[bound]:
+                bound += 1
+                if shard is not None:
+                    yield self._finish_shard(shard)
+                    shard = None
+            if shard is None:
+                shard = {'first': row[0], 'count': 0, 'lastmod': None,
+                         'digest': hashlib.md5(), 'range': bound}
+            lastmod = row[1] if self.has_lastmod else None
+            shard['last'] = row[0]
+            shard['count'] += 1
+            shard['digest'].update(force_bytes('{}|{};'.format(
+                row[0], _format_lastmod(lastmod))))
+            if lastmod is not None and (shard['lastmod'] is None or
+                                        lastmod > shard['lastmod']):
+                shard['lastmod'] = lastmod
+            at_bound = bound < len(bounds) and row[0] == bounds[bound]
+            if at_bound:
+                bound += 1
+            if at_bound or shard['count'] == self.shard_size:
+                yield self._finish_shard(shard)
+                shard = None
+        if shard is not None:
+            yield self._finish_shard(shard)
+
+    def _finish_shard(self, shard):
+        shard['digest'] = hashlib.md5(force_bytes('|'.join([
+            shard['digest'].hexdigest(), ','.join(self.languages),
+            self.base_url,
+        ]))).hexdigest()
+        shard['lastmod'] = _format_lastmod(shard['lastmod'])
+        shard['first'] = force_text(shard['first'])
+        shard['last'] = force_text(shard['last'])
+        return shard
+
+    def get_shard_instances(self, shard):
+        return self.get_queryset() \
+            .filter(pk__gte=shard['first'], pk__lte=shard['last']) \
+            .order_by('pk').iterator(chunk_size=self.chunk_size)
+
+    def get_urls(self, instances):
+        """
+        Return the URLs of ``instances`` as a list of dictionaries, one per
+        instance, with the language codes as keys (or ``None`` for models
+        without multilingual URLs).
+
+        The language is activated once per language for all the instances,
+        instead of once per instance and language.
+        """
+        if not self.multilingual:
+            return [{None: self.base_url + obj.get_absolute_url()}
+                    for obj in instances]
+        urls = [{} for __ in instances]
+        for lang in self.languages:
+            with translation.override(lang):
+                for obj_urls, obj in zip(urls, instances):
+                    if self.custom_urls_for_lang:
+                        url = obj.get_absolute_url_for_lang(lang)
+                    else:
+                        url = obj.get_absolute_url()
+                    obj_urls[lang] = self.base_url + force_text(url)
+        return urls
+
+    def render_shard(self, shard):
+        """
+        Yield the XML of the sitemap of ``shard`` in chunks.
+        """
+        yield _URLSET_START
+        instances = []
+        for obj in self.get_shard_instances(shard):
+            instances.append(obj)
+            if len(instances) == self.chunk_size:
+                for chunk in self._render_instances(instances):
+                    yield chunk
+                instances = []
+        for chunk in self._render_instances(instances):
+            yield chunk
+        yield _URLSET_END
+
+    def _render_instances(self, instances):
+        for obj, urls in zip(instances, self.get_urls(instances)):
+            lastmod = ''
+            if self.has_lastmod and obj.date_updated is not None:
+                lastmod = '<lastmod>{}</lastmod>'.format(
+                    obj.date_updated.isoformat())
+            # Languages without URLs of their own share a single entry
+            locations = []
+            for url in urls.values():
+                if url not in locations:
+                    locations.append(url)
+            alternates = ''
+            if len(locations) > 1:
+                alternates = ''.join(
+                    '<xhtml:link rel="alternate" hreflang={} href={}/>'.format(
+                        quoteattr(lang), quoteattr(url))
+                    for lang, url in urls.items())
+            for url in locations:
+                yield '<url><loc>{}</loc>{}{}</url>\n'.format(
+                    escape(url), lastmod, alternates)
+
+    def load_manifest(self, output_dir):
+        path = os.path.join(output_dir, self.get_manifest_filename())
+        if not os.path.exists(path):
+            return []
+        with io.open(path, encoding='utf-8') as f:
+            return json.load(f)
+
+    def generate(self, output_dir, full=False):
+        """
+        Write the shards of this sitemap whose contents changed (or all of
+        them, if ``full``) in ``output_dir``, remove the ones that are not
+        needed any more and return the entries of the shards for the index,
+        as dictionaries with their ``filename`` and ``lastmod``.
+
+        The primary key ranges of the shards of the previous run are kept,
+        apart from that of the last shard, which grows up to ``shard_size``
+        instances, and so are the ids that name their files. Shards split
+        off a range get new ids. With ``full`` the shards are split again
+        from scratch.
+        """
+        previous_manifest = self.load_manifest(output_dir)
+        previous = {
+            entry['filename']: entry['digest']
+            for entry in previous_manifest}
+        # The manifests of older versions named the shards by their position
+        previous_ids = [
+            entry.get('id', index)
+            for index, entry in enumerate(previous_manifest)]
+        bounds = []
+        keep_ranges = not full and previous_manifest and \
+            all('last' in entry for entry in previous_manifest)
+        if keep_ranges:
+            bounds = [entry['last'] for entry in previous_manifest[:-1]]
+        else:
+            previous_ids = []
+        next_id = max(previous_ids) + 1 if previous_ids else 0
+        kept_ranges = set()
+        manifest = []
+        for shard in self.iter_shards(bounds):
+            if shard['range'] < len(previous_ids) and \
+                    shard['range'] not in kept_ranges:
+                shard_id = previous_ids[shard['range']]
+                kept_ranges.add(shard['range'])
+            else:
+                shard_id = next_id
+                next_id += 1
+            filename = self.get_shard_filename(shard_id)
+            path = os.path.join(output_dir, filename)
+            if full or previous.get(filename) != shard['digest'] or \
+                    not os.path.exists(path):
+                _write_atomically(path, self.render_shard(shard))
+            manifest.append({
+                'id': shard_id,
+                'filename': filename,
+                'digest': shard['digest'],
+                'lastmod': shard['lastmod'],
+                'count': shard['count'],
+                'first': shard['first'],
+                'last': shard['last'],
+            })
+
+        filenames = set(entry['filename'] for entry in manifest)
+        for filename in set(previous) - filenames:
+            path = os.path.join(output_dir, filename)
+            if os.path.exists(path):
+                os.remove(path)
+
+        _write_atomically(
+            os.path.join(output_dir, self.get_manifest_filename()),
+            [json.dumps(manifest, indent=2)])
+        return manifest
+
+
+def write_sitemap_index(entries, path, files_url):
+    """
+    Write the sitemap index of the shards in ``entries`` (as returned by
+    ``ShardedSitemap.generate``) to ``path``. ``files_url`` is the URL that
+    the shards are served under.
+    """
+    files_url = files_url.rstrip('/') + '/'
+
+    def render():
+        yield ('<?xml version="1.0" encoding="UTF-8"?>\n'
+               '<sitemapindex '
+               'xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n')
+        for entry in entries:
+            lastmod = ''
+            if entry.get('lastmod'):
+                lastmod = '<lastmod>{}</lastmod>'.format(entry['lastmod'])
+            yield '<sitemap><loc>{}</loc>{}</sitemap>\n'.format(
+                escape(files_url + entry['filename']), lastmod)
+        yield '</sitemapindex>\n'
+
+    _write_atomically(path, render())
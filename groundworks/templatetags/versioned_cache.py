@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+"""
+Template tags for ``groundworks.cache``.
+"""
+from __future__ import unicode_literals
+
+from django import template
+
+from groundworks.cache import get_fragments, make_fragment_key, set_fragment
+
+
+register = template.Library()
+
+# The context variable holding the fragments fetched by prefetch_fragments
+PREFETCHED_FRAGMENTS = '_groundworks_prefetched_fragments'
+
+
+class VersionedCacheNode(template.Node):
+    def __init__(self, nodelist, obj, fragment, timeout):
+        self.nodelist = nodelist
+        self.obj = obj
+        self.fragment = fragment
+        self.timeout = timeout
+
+    def render(self, context):
+        obj = self.obj.resolve(context)
+        fragment = self.fragment.resolve(context)
+        timeout = self.timeout.resolve(context) if self.timeout else None
+        if make_fragment_key(obj, fragment) is None:
+            return self.nodelist.render(context)
+
+        prefetched = context.get(PREFETCHED_FRAGMENTS, {})
+        value = prefetched.get((fragment, obj.pk))
+        if value is None and (fragment, obj.pk) not in prefetched:
+            value = get_fragments([obj], fragment).get(obj.pk)
+        if value is None:
+            value = self.nodelist.render(context)
+            set_fragment(obj, fragment, value, timeout)
+        return value
+
+
+@register.tag
+def versioned_cache(parser, token):
+    """
+    Cache the contents of the block for a ``TimeStamped`` instance, under a
+    key that includes its ``date_updated`` and the active language, so that
+    it is invalidated whenever the instance is saved.
+
+    Usage::
+
+        {% versioned_cache article "body" [timeout] %}
+            {{ article.content|safe }}
+        {% endversioned_cache %}
+    """
+    bits = token.split_contents()
+    if len(bits) not in (3, 4):
+        raise template.TemplateSyntaxError(
+            "'{}' tag requires an instance, a fragment name and optionally "
+            "a timeout.".format(bits[0]))
+    nodelist = parser.parse(('endversioned_cache',))
+    parser.delete_first_token()
+    timeout = parser.compile_filter(bits[3]) if len(bits) == 4 else None
+    return VersionedCacheNode(
+        nodelist, parser.compile_filter(bits[1]),
+        parser.compile_filter(bits[2]), timeout)
+
+
+@register.simple_tag(takes_context=True)
+def prefetch_fragments(context, objs, fragment):
+    """
+    Fetch the cached ``fragment`` of all ``objs`` with a single cache
+    round-trip, for use by the ``versioned_cache`` tags that follow.
+
+    Usage::
+
+        {% prefetch_fragments articles "body" %}
+        {% for article in articles %}
+            {% versioned_cache article "body" %}...{% endversioned_cache %}
+        {% endfor %}
+    """
+    objs = list(objs)
+    found = get_fragments(objs, fragment)
+    prefetched = context.get(PREFETCHED_FRAGMENTS, {}).copy()
+    for obj in objs:
+        prefetched[(fragment, obj.pk)] = found.get(obj.pk)
+    context[PREFETCHED_FRAGMENTS] = prefetched
+    return ''
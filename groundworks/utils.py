@@ -4,11 +4,33 @@ from __future__ import unicode_literals
 import uuid
 
 from django.contrib.auth import get_user_model
+from django.db import connections, models, router
+from django.utils import six
 from django.utils.encoding import force_text
+from django.utils.functional import LazyObject, empty
+from django.utils.six.moves import html_parser
 from django.utils.text import slugify
 from django.utils import timezone
 
 
+class LazyUserModel(LazyObject):
+    """
+    A proxy to the User model, which is resolved via ``get_user_model`` on
+    first use, so that it can be set at import time without requiring the
+    app registry to be ready.
+
+    Calling it creates an instance of the User model.
+    """
+
+    def _setup(self):
+        self._wrapped = get_user_model()
+
+    def __call__(self, *args, **kwargs):
+        if self._wrapped is empty:
+            self._setup()
+        return self._wrapped(*args, **kwargs)
+
+
 def has_edit_user_permissions(user):
     """
     Checks whether a given User has permissions to both add and change Users.
@@ -20,6 +42,52 @@ def has_edit_user_permissions(user):
     return user.has_perms(perms)
 
 
+def bulk_insert(model, instances, using=None, batch_size=None):
+    """
+    Create ``instances`` with ``bulk_create``, making sure that they get their
+    primary keys set even on databases that cannot return them from a bulk
+    insert (e.g. SQLite and MySQL).
+
+    On such databases, the instances without a primary key are inserted one
+    by one instead. Like ``bulk_create``, this neither calls ``save`` nor
+    sends any signals.
+    """
+    instances = list(instances)
+    using = using or router.db_for_write(model)
+    manager = model._default_manager.db_manager(using)
+    if connections[using].features.can_return_ids_from_bulk_insert:
+        return manager.bulk_create(instances, batch_size=batch_size)
+
+    with_pk = [obj for obj in instances if obj.pk is not None]
+    if with_pk:
+        manager.bulk_create(with_pk, batch_size=batch_size)
+    fields = [field for field in model._meta.concrete_fields
+              if not isinstance(field, models.AutoField)]
+    for obj in instances:
+        if obj.pk is not None:
+            continue
+        obj.pk = manager._insert(
+            [obj], fields=fields, return_id=True, using=using)
+        obj._state.adding = False
+        obj._state.db = using
+    return instances
+
+
+_unidecode = None
+
+
+def _get_unidecode():
+    """
+    Import ``unidecode`` on first use only, since it is an optional
+    dependency and not a light one.
+    """
+    global _unidecode
+    if _unidecode is None:
+        from unidecode import unidecode
+        _unidecode = unidecode
+    return _unidecode
+
+
 def upload_path(instance, filename):
     """
     A callable for creating upload paths for files. The output path will be
@@ -29,7 +97,7 @@ def upload_path(instance, filename):
 
     See: https://docs.djangoproject.com/en/1.10/ref/models/fields/#django.db.models.FileField.upload_to
     """
-    from unidecode import unidecode
+    unidecode = _get_unidecode()
 
     _filename, ext = filename.rsplit('.', 1)
     _random, __ = force_text(uuid.uuid4()).split('-', 1)
@@ -58,3 +126,88 @@ def upload_path(instance, filename):
     new_filename = '.'.join([subject, ext])
 
     return '/'.join([year, month, day, new_filename])
+
+
+class HTMLTextExtractor(html_parser.HTMLParser):
+    """
+    A streaming HTML to plain text converter. Feed it with HTML, in as many
+    chunks as needed, and get the text found so far via ``get_text``.
+
+    The contents of ``script``, ``style`` and similar elements are skipped
+    and block level elements are separated by new lines.
+    """
+    skipped_tags = {'script', 'style', 'head', 'title', 'template'}
+    block_tags = {
+        'address', 'article', 'aside', 'blockquote', 'br', 'dd', 'div', 'dl',
+        'dt', 'figcaption', 'figure', 'footer', 'h1', 'h2', 'h3', 'h4', 'h5',
+        'h6', 'header', 'hr', 'li', 'main', 'nav', 'ol', 'p', 'pre',
+        'section', 'table', 'td', 'th', 'tr', 'ul',
+    }
+
+    def __init__(self):
+        html_parser.HTMLParser.__init__(self)
+        self._blocks = []
+        self._current = []
+        self._skipping = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in self.skipped_tags:
+            self._skipping += 1
+        elif tag in self.block_tags:
+            self._end_block()
+
+    def handle_startendtag(self, tag, attrs):
+        if tag in self.block_tags:
+            self._end_block()
+
+    def handle_endtag(self, tag):
+        if tag in self.skipped_tags:
+            self._skipping = max(self._skipping - 1, 0)
+        elif tag in self.block_tags:
+            self._end_block()
+
+    def handle_data(self, data):
+        if not self._skipping:
+            self._current.append(data)
+
+    def handle_entityref(self, name):
+        # Only called when charrefs are not converted (i.e. in Python 2)
+        self.handle_data(self.unescape('&{};'.format(name)))
+
+    def handle_charref(self, name):
+        self.handle_data(self.unescape('&#{};'.format(name)))
+
+    def _end_block(self):
+        block = ' '.join(''.join(self._current).split())
+        if block:
+            self._blocks.append(block)
+        self._current = []
+
+    def get_text(self):
+        self._end_block()
+        return '\n'.join(self._blocks)
+
+
+def html_to_text(html, chunk_size=8192):
+    """
+    Return the plain text of ``html``, fed to ``HTMLTextExtractor`` in chunks.
+    """
+    html = force_text(html or '')
+    extractor = HTMLTextExtractor()
+    for start in six.moves.range(0, len(html), chunk_size):
+        extractor.feed(html[start:start + chunk_size])
+    extractor.close()
+    return extractor.get_text()
+
+
+def make_excerpt(text, length, ellipsis='\u2026'):
+    """
+    Return at most ``length`` characters of ``text``, cut at a word boundary.
+    """
+    text = ' '.join(text.split())
+    if len(text) <= length:
+        return text
+    excerpt = text[:length - len(ellipsis) + 1]
+    excerpt = excerpt.rsplit(' ', 1)[0] if ' ' in excerpt else \
+        excerpt[:length - len(ellipsis)]
+    return excerpt.rstrip(' ,.;:') + ellipsis
@@ -33,6 +33,10 @@ setup(
     },
     include_package_data=True,
     install_requires=requirements,
+    extras_require={
+        'async': ['asgiref>=3.2'],
+    },
+    python_requires='>=3.5',
     license="BSD license",
     zip_safe=False,
     keywords='django_groundworks',
@@ -41,11 +45,9 @@ setup(
         'Intended Audience :: Developers',
         'License :: OSI Approved :: BSD License',
         'Natural Language :: English',
-        "Programming Language :: Python :: 2",
-        'Programming Language :: Python :: 2.7',
         'Programming Language :: Python :: 3',
-        'Programming Language :: Python :: 3.3',
-        'Programming Language :: Python :: 3.4',
         'Programming Language :: Python :: 3.5',
+        'Programming Language :: Python :: 3.6',
+        'Programming Language :: Python :: 3.7',
     ],
 )
@@ -0,0 +1,11 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for groundworks.
+
+Run them from the root of the repository with::
+
+    $ django-admin test tests --settings=tests.settings --pythonpath=.
+
+They use their own settings and an in-memory SQLite database, so they do not
+need a project. They need the ``async`` extra (``asgiref``) installed.
+"""
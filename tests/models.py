@@ -0,0 +1,43 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import models
+
+from groundworks.archiving import make_archive_model
+from groundworks.contrib.uuslug.managers import UUSluggedManager
+from groundworks.contrib.uuslug.models import UUSlugged
+from groundworks.models import Publishable, TimeStamped, Undeletable, \
+    WithMultilingualURL
+
+
+class Tag(models.Model):
+    name = models.CharField(max_length=50)
+
+
+class Post(TimeStamped):
+    title = models.CharField(max_length=255)
+    tags = models.ManyToManyField(Tag, blank=True)
+
+
+class Story(UUSlugged):
+    title = models.CharField(max_length=255)
+    # Short, so that the truncation of the slugs can be tested
+    slug = models.SlugField(max_length=20, unique=True, blank=True)
+
+    objects = UUSluggedManager()
+
+
+class Entry(Publishable, WithMultilingualURL):
+    title = models.CharField(max_length=255)
+    # Clashes with the names that the archive API used to use
+    date = models.DateField(null=True, blank=True)
+
+    def get_absolute_url(self):
+        return '/entries/{}/'.format(self.pk)
+
+
+class Note(Undeletable):
+    text = models.CharField(max_length=255)
+
+
+NoteArchive = make_archive_model(Note)
@@ -0,0 +1,20 @@
+# -*- coding: utf-8 -*-
+"""
+Minimal settings for running the tests.
+"""
+SECRET_KEY = 'tests'
+USE_TZ = True
+
+INSTALLED_APPS = [
+    'django.contrib.contenttypes',
+    'django.contrib.auth',
+    'groundworks',
+    'tests',
+]
+
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': ':memory:',
+    },
+}
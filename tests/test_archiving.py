@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import datetime
+
+from django.test import TestCase
+from django.utils import timezone
+
+from groundworks.archiving import archive_deleted, restore_archived
+
+from .models import Note, NoteArchive
+
+
+class ArchivingTests(TestCase):
+
+    def setUp(self):
+        now = timezone.now()
+        self.old = [
+            Note.objects.create(
+                text='old', date_deleted=now - datetime.timedelta(days=100))
+            for __ in range(3)]
+        self.recent = Note.objects.create(text='recent', date_deleted=now)
+        self.live = Note.objects.create(text='live')
+
+    def test_delete_is_saved(self):
+        self.live.delete()
+        self.assertIsNotNone(
+            Note.objects.get(pk=self.live.pk).date_deleted)
+
+    def test_archive_deleted(self):
+        moved = archive_deleted(
+            Note, datetime.timedelta(days=30), batch_size=2)
+        self.assertEqual(moved, 3)
+        self.assertEqual(
+            sorted(NoteArchive.objects.values_list('pk', flat=True)),
+            [note.pk for note in self.old])
+        self.assertEqual(
+            sorted(Note.objects.values_list('pk', flat=True)),
+            [self.recent.pk, self.live.pk])
+
+    def test_restore_archived(self):
+        archive_deleted(Note, datetime.timedelta(days=30))
+        self.assertEqual(restore_archived(Note, [self.old[0].pk]), 1)
+        restored = Note.objects.get(pk=self.old[0].pk)
+        self.assertEqual(restored.text, 'old')
+        self.assertEqual(restored.date_deleted, self.old[0].date_deleted)
+        self.assertEqual(NoteArchive.objects.count(), 2)
+
+    def test_deleted_excludes_archived(self):
+        archive_deleted(Note, datetime.timedelta(days=30))
+        self.assertEqual(
+            list(Note.objects.deleted().values_list('pk', flat=True)),
+            [self.recent.pk])
+        self.assertEqual(
+            list(Note.objects.not_deleted().values_list('pk', flat=True)),
+            [self.live.pk])
+
+    def test_deleted_with_archived(self):
+        archive_deleted(Note, datetime.timedelta(days=30))
+        notes = Note.objects.deleted_with_archived()
+        self.assertEqual(
+            sorted(note.pk for note in notes),
+            sorted([self.recent.pk] + [note.pk for note in self.old]))
+        self.assertTrue(all(isinstance(note, Note) for note in notes))
@@ -0,0 +1,45 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import datetime
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import six, timezone
+
+from .models import Post
+
+
+class BackfillTimeStampedTests(TestCase):
+
+    def setUp(self):
+        self.placeholder = datetime.datetime(
+            2000, 1, 1, tzinfo=timezone.utc)
+        self.timestamp = datetime.datetime(
+            2010, 1, 1, tzinfo=timezone.utc)
+        for __ in range(3):
+            Post.objects.create(title='post')
+        # As the default of a NOT NULL column added by a migration would
+        Post.objects.update(
+            date_created=self.placeholder, date_updated=self.placeholder)
+        self.recent = Post.objects.create(title='recent')
+
+    def backfill(self, *args):
+        call_command(
+            'backfill_mixins', 'tests.Post', '--mixins', 'timestamped',
+            '--timestamp', self.timestamp.isoformat(),
+            '--batch-size', '2', stdout=six.StringIO(), *args)
+
+    def test_placeholder(self):
+        self.backfill('--placeholder', self.placeholder.isoformat())
+        self.assertEqual(
+            Post.objects.filter(date_created=self.timestamp).count(), 3)
+        self.assertEqual(
+            Post.objects.filter(date_updated=self.timestamp).count(), 3)
+        recent = Post.objects.get(pk=self.recent.pk)
+        self.assertEqual(recent.date_created, self.recent.date_created)
+
+    def test_without_placeholder(self):
+        self.backfill()
+        self.assertFalse(
+            Post.objects.filter(date_created=self.timestamp).exists())
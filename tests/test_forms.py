@@ -0,0 +1,39 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.forms import modelformset_factory
+from django.test import TestCase
+
+from groundworks.forms import BulkSaveModelFormSet
+
+from .models import Post, Tag
+
+
+PostFormSet = modelformset_factory(
+    Post, formset=BulkSaveModelFormSet, fields=('title', 'tags'), extra=2)
+
+
+class BulkSaveModelFormSetTests(TestCase):
+
+    def test_save_new_with_m2m(self):
+        tags = [Tag.objects.create(name='a'), Tag.objects.create(name='b')]
+        formset = PostFormSet({
+            'form-TOTAL_FORMS': '2',
+            'form-INITIAL_FORMS': '0',
+            'form-0-title': 'first',
+            'form-0-tags': [tags[0].pk],
+            'form-1-title': 'second',
+            'form-1-tags': [tags[0].pk, tags[1].pk],
+        }, queryset=Post.objects.none())
+        self.assertTrue(formset.is_valid(), formset.errors)
+
+        saved = formset.save()
+
+        self.assertTrue(all(post.pk is not None for post in saved))
+        self.assertEqual(
+            [(post.title, sorted(post.tags.values_list('name', flat=True)))
+             for post in Post.objects.order_by('pk')],
+            [('first', ['a']), ('second', ['a', 'b'])])
+        self.assertEqual(
+            sorted(post.pk for post in saved),
+            list(Post.objects.order_by('pk').values_list('pk', flat=True)))
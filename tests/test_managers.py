@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import datetime
+
+from asgiref.sync import async_to_sync
+from django.core.cache import caches
+from django.test import TestCase
+from django.utils import timezone
+
+from .models import Entry
+
+
+class CachedArchiveTests(TestCase):
+
+    def setUp(self):
+        caches['default'].clear()
+        now = timezone.now()
+        for days in (1, 2, 400):
+            Entry.objects.create(
+                title='entry', is_published=True,
+                date_published=now - datetime.timedelta(days=days))
+
+    def test_archive(self):
+        archive = list(Entry.objects.archive('year'))
+        self.assertEqual(sum(row['count'] for row in archive), 3)
+        self.assertEqual(set(archive[0]), {'archive_date', 'count'})
+
+    def test_cached_on_manager(self):
+        archive = Entry.objects.cached_archive()
+        with self.assertNumQueries(0):
+            self.assertEqual(Entry.objects.cached_archive(), archive)
+
+    def test_cached_after_published(self):
+        archive = Entry.objects.published().cached_archive()
+        with self.assertNumQueries(0):
+            self.assertEqual(
+                Entry.objects.published().cached_archive(), archive)
+
+    def test_empty_queryset(self):
+        with self.assertNumQueries(0):
+            self.assertEqual(Entry.objects.none().cached_archive(), [])
+            self.assertEqual(
+                Entry.objects.filter(pk__in=[]).cached_archive(), [])
+
+
+class AsyncTests(TestCase):
+
+    def setUp(self):
+        now = timezone.now()
+        for days in (1, 2, 3):
+            Entry.objects.create(
+                title='entry {}'.format(days), is_published=True,
+                date_published=now - datetime.timedelta(days=days))
+
+    def test_alist_sliced(self):
+        queryset = Entry.objects.published().order_by('-date_published')[:2]
+        entries = async_to_sync(queryset.alist)()
+        self.assertEqual(
+            [entry.title for entry in entries], ['entry 1', 'entry 2'])
+
+    def test_alist_projected(self):
+        queryset = Entry.objects.published().project('title')
+        rows = async_to_sync(queryset.alist)()
+        self.assertEqual(len(rows), 3)
+
+    def test_helper(self):
+        entries = async_to_sync(Entry.objects.apublished)()
+        self.assertEqual(len(entries), 3)
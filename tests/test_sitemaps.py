@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import datetime
+import io
+import os
+import shutil
+import tempfile
+
+from django.test import TestCase
+from django.utils import timezone
+
+from groundworks.sitemaps import ShardedSitemap
+
+from .models import Entry
+
+
+class ShardedSitemapTests(TestCase):
+
+    def setUp(self):
+        self.output_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.output_dir)
+        date_published = timezone.now() - datetime.timedelta(days=1)
+        self.entries = [
+            Entry.objects.create(
+                title='entry', is_published=True,
+                date_published=date_published)
+            for __ in range(25)]
+        self.sitemap = ShardedSitemap(
+            Entry, 'https://example.com', languages=['en', 'de'],
+            shard_size=10)
+
+    def read(self, filename):
+        path = os.path.join(self.output_dir, filename)
+        with io.open(path, encoding='utf-8') as f:
+            return f.read()
+
+    def test_unchanged_shards_keep_their_files(self):
+        manifest = self.sitemap.generate(self.output_dir)
+        filenames = [entry['filename'] for entry in manifest]
+        self.assertEqual(len(filenames), 3)
+        contents = [self.read(filename) for filename in filenames[1:]]
+
+        Entry.objects.filter(pk__in=[
+            entry.pk for entry in self.entries[:10]]).update(
+                is_published=False)
+        manifest = self.sitemap.generate(self.output_dir)
+        self.assertEqual(
+            [entry['filename'] for entry in manifest], filenames[1:])
+        self.assertEqual(
+            [self.read(filename) for filename in filenames[1:]], contents)
+        self.assertFalse(
+            os.path.exists(os.path.join(self.output_dir, filenames[0])))
+
+    def test_split_shard_gets_a_new_file(self):
+        filenames = [
+            entry['filename']
+            for entry in self.sitemap.generate(self.output_dir)]
+        self.sitemap.shard_size = 4
+        manifest = self.sitemap.generate(self.output_dir)
+        new_filenames = [entry['filename'] for entry in manifest]
+        self.assertEqual(new_filenames[0], filenames[0])
+        self.assertEqual(len(new_filenames), len(set(new_filenames)))
+        self.assertEqual(
+            sorted(os.listdir(self.output_dir)),
+            sorted(new_filenames + [self.sitemap.get_manifest_filename()]))
+
+    def test_shared_urls_are_listed_once(self):
+        manifest = self.sitemap.generate(self.output_dir)
+        xml = self.read(manifest[0]['filename'])
+        self.assertEqual(xml.count('<loc>'), 10)
+        self.assertNotIn('hreflang', xml)
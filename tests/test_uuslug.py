@@ -0,0 +1,153 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from unittest import mock
+
+from django.core.cache import caches
+from django.db import connection, transaction
+from django.forms import modelformset_factory
+from django.test import TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+
+from groundworks.contrib.uuslug import utils
+from groundworks.contrib.uuslug.cache import get_slug_cache, \
+    invalidate_slug_cache
+from groundworks.contrib.uuslug.utils import allocate_slugs, \
+    bulk_create_slugged, get_taken_slugs
+from groundworks.forms import BulkSaveModelFormSet
+
+from .models import Story
+
+
+class AllocateSlugsTests(TestCase):
+
+    def test_counter(self):
+        for __ in range(3):
+            Story.objects.create(title='News')
+        self.assertEqual(
+            sorted(Story.objects.values_list('slug', flat=True)),
+            ['news', 'news-1', 'news-2'])
+
+    def test_counter_within_batch(self):
+        Story.objects.create(title='News')
+        stories = [Story(title='News'), Story(title='News'),
+                   Story(title='Other')]
+        self.assertEqual(
+            allocate_slugs(stories), ['news-1', 'news-2', 'other'])
+
+    def test_single_query(self):
+        Story.objects.create(title='News')
+        with CaptureQueriesContext(connection) as queries:
+            allocate_slugs([Story(title='News'), Story(title='Other')])
+        self.assertEqual(len(queries), 1)
+
+    def test_truncation(self):
+        title = 'a very long title for a story'
+        first = Story.objects.create(title=title)
+        second = Story.objects.create(title=title)
+        self.assertEqual(first.slug, 'a-very-long-title-fo')
+        self.assertEqual(second.slug, 'a-very-long-title-1')
+
+    def test_current_slug_is_kept(self):
+        story = Story.objects.create(title='News')
+        self.assertEqual(allocate_slugs([story]), ['news'])
+        self.assertEqual(story.generate_slug('Brand new'), 'brand-new')
+
+    def test_empty_base(self):
+        first = Story.objects.create(title='!!!')
+        second = Story.objects.create(title='\U0001f600')
+        self.assertEqual([first.slug, second.slug], ['story', 'story-1'])
+
+    def test_no_query_for_empty_prefix(self):
+        with self.assertNumQueries(0):
+            self.assertEqual(get_taken_slugs(Story, ['']), set())
+
+
+class SlugRetryTests(TestCase):
+
+    def taking_first_slug(self, allocate):
+        """
+        Return a replacement of ``allocate`` that allocates a taken slug the
+        first time, as if a concurrent insert grabbed it.
+        """
+        calls = []
+
+        def allocate_taken(instances, *args, **kwargs):
+            calls.append(instances)
+            if len(calls) == 1:
+                return ['taken'] * len(instances)
+            return allocate(instances, *args, **kwargs)
+        return allocate_taken
+
+    def test_save_retries(self):
+        Story.objects.create(title='Taken', slug='taken')
+        with mock.patch.object(
+                utils, 'allocate_slugs',
+                self.taking_first_slug(allocate_slugs)):
+            story = Story.objects.create(title='Taken')
+        self.assertEqual(story.slug, 'taken-1')
+
+    def test_bulk_create_retries(self):
+        Story.objects.create(title='Taken', slug='taken')
+        with mock.patch.object(
+                utils, 'allocate_slugs',
+                self.taking_first_slug(allocate_slugs)):
+            stories = bulk_create_slugged(
+                Story, [Story(title='Taken'), Story(title='Other')])
+        self.assertEqual([story.slug for story in stories],
+                         ['taken-1', 'other'])
+        self.assertTrue(all(story.pk for story in stories))
+
+
+class SlugCacheTests(TransactionTestCase):
+
+    def setUp(self):
+        self.slug_cache = get_slug_cache(Story)
+        self.slug_cache.local.clear()
+        caches['default'].clear()
+
+    def test_save_and_delete(self):
+        story = Story.objects.create(title='Hello')
+        self.assertEqual(self.slug_cache.get_slug(story.pk), 'hello')
+        story.slug = 'bye'
+        story.save()
+        self.assertEqual(Story.objects.get_slug_for_pk(story.pk), 'bye')
+        self.assertEqual(Story.objects.get_by_slug('bye'), story)
+        pk = story.pk
+        story.delete()
+        self.assertIsNone(self.slug_cache.get_slug(pk))
+        self.assertIsNone(self.slug_cache.get_pk('bye'))
+
+    def test_rollback(self):
+        try:
+            with transaction.atomic():
+                story = Story.objects.create(title='Hello')
+                raise ValueError
+        except ValueError:
+            pass
+        self.assertIsNone(self.slug_cache.get_slug(story.pk))
+        self.assertIsNone(self.slug_cache.get_pk('hello'))
+
+    def test_bulk_formset(self):
+        story = Story.objects.create(title='Hello')
+        self.assertEqual(Story.objects.get_slug_for_pk(story.pk), 'hello')
+        StoryFormSet = modelformset_factory(
+            Story, formset=BulkSaveModelFormSet, fields=('title', 'slug'),
+            extra=0)
+        formset = StoryFormSet({
+            'form-TOTAL_FORMS': '1',
+            'form-INITIAL_FORMS': '1',
+            'form-0-id': str(story.pk),
+            'form-0-title': 'Hello',
+            'form-0-slug': 'renamed',
+        }, queryset=Story.objects.all())
+        self.assertTrue(formset.is_valid(), formset.errors)
+        formset.save()
+        self.assertEqual(Story.objects.get_slug_for_pk(story.pk), 'renamed')
+
+    def test_invalidate_after_update(self):
+        story = Story.objects.create(title='Hello')
+        Story.objects.filter(pk=story.pk).update(slug='updated')
+        invalidate_slug_cache(Story, [story.pk])
+        self.assertEqual(Story.objects.get_slug_for_pk(story.pk), 'updated')
+        self.assertIsNone(self.slug_cache.get_pk('hello'))